@@ -1,18 +1,46 @@
 import subprocess
-import threading
 import time
 import sys
 import os
+import requests
 from config import Config
 
 def run_flask_backend():
-    """Run Flask backend in a separate process"""
+    """Start Flask backend in a separate process and return its handle"""
+    return subprocess.Popen([sys.executable, "flask_backend.py"])
+
+def get_model_state(base_url=None):
+    """Model state reported by the backend's /ready endpoint, or None if unreachable"""
     try:
-        subprocess.run([sys.executable, "flask_backend.py"], check=True)
-    except KeyboardInterrupt:
-        print("Flask backend stopped")
-    except Exception as e:
-        print(f"Error running Flask backend: {e}")
+        response = requests.get(f"{base_url or f'http://{Config.FLASK_HOST}:{Config.FLASK_PORT}'}/ready", timeout=2)
+        return response.json()['components']['model']
+    except (requests.RequestException, ValueError, KeyError):
+        return None
+
+def wait_for_backend(process=None, timeout=Config.STARTUP_TIMEOUT, base_url=None):
+    """Poll the backend readiness endpoint until the model is loaded and warm"""
+    url = f"{base_url or f'http://{Config.FLASK_HOST}:{Config.FLASK_PORT}'}/ready"
+    deadline = time.time() + timeout
+    last_state = None
+    
+    while time.time() < deadline:
+        # Stop waiting as soon as the backend process has died
+        if process is not None and process.poll() is not None:
+            return False
+        try:
+            response = requests.get(url, timeout=2)
+            if response.status_code == 200:
+                return True
+            model_state = response.json()['components']['model']
+            if model_state != last_state:
+                print(f"   model: {model_state}")
+                last_state = model_state
+            if model_state == 'failed':
+                return False
+        except (requests.RequestException, ValueError, KeyError):
+            pass  # Server not listening yet
+        time.sleep(0.25)
+    return False
 
 def run_streamlit_frontend():
     """Run Streamlit frontend"""
@@ -34,13 +62,21 @@ def main():
     # Create necessary directories
     os.makedirs(Config.RECORDING_PATH, exist_ok=True)
     
-    # Start Flask backend in a separate thread
-    flask_thread = threading.Thread(target=run_flask_backend, daemon=True)
-    flask_thread.start()
+    # Start Flask backend in a separate process
+    flask_process = run_flask_backend()
     
-    # Wait a moment for Flask to start
+    # Wait until the backend reports ready instead of sleeping a fixed time
     print("⏳ Starting Flask backend...")
-    time.sleep(3)
+    started = time.time()
+    if wait_for_backend(flask_process):
+        print(f"✅ Flask backend ready in {time.time() - started:.1f}s")
+    elif flask_process.poll() is not None:
+        print(f"❌ Flask backend exited with code {flask_process.returncode}")
+        sys.exit(1)
+    elif get_model_state() == 'failed':
+        print("❌ YOLO model failed to load: cameras will stream WITHOUT object detection (see the backend log)")
+    else:
+        print("⚠️ Flask backend not ready yet, starting frontend anyway (see /ready)")
     
     # Start Streamlit frontend
     print("🌐 Starting Streamlit frontend...")
@@ -53,6 +89,8 @@ def main():
     except KeyboardInterrupt:
         print("\n🛑 Shutting down surveillance system...")
         sys.exit(0)
+    finally:
+        flask_process.terminate()
 
 if __name__ == "__main__":
     main()
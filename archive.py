@@ -0,0 +1,176 @@
+import os
+import shutil
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+ARCHIVE_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('objects_detected', pa.string()),
+    ('confidence_scores', pa.string()),
+    ('timestamp', pa.string()),
+])
+
+# Explicit type so numeric-looking camera names aren't inferred as integers
+CAMERA_PARTITIONING = ds.partitioning(pa.schema([('camera', pa.string())]), flavor='hive')
+
+# Highest archived id, shared with readers in other processes; the leading
+# underscore keeps it out of pyarrow datasets
+MAX_ID_FILE = '_max_id'
+
+class DetectionArchive:
+    """Cold tier for detection logs: Parquet files partitioned by day and camera.
+
+    Layout is hive-style (date=YYYY-MM-DD/camera=<name>/part-<ids>.parquet) so
+    queries prune whole directories and push id filters down to row groups.
+    Part files are named by their id range, so cursor (since_id) queries can
+    skip partitions from a directory listing without opening any Parquet.
+    Rows come back in the same tuple shape as detection_logs.
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        os.makedirs(archive_path, exist_ok=True)
+
+    def write(self, rows):
+        """Write detection_logs rows (id, camera, objects, confidences, timestamp)"""
+        partitions = {}
+        for row in rows:
+            partitions.setdefault((row[4][:10], row[1]), []).append(row)
+
+        for (day, camera_name), part_rows in partitions.items():
+            directory = os.path.join(self.archive_path, f"date={day}",
+                                     f"camera={quote(camera_name, safe='')}")
+            os.makedirs(directory, exist_ok=True)
+            # Named by id range so re-archiving the same batch after a crash overwrites it
+            name = f"part-{part_rows[0][0]}-{part_rows[-1][0]}.parquet"
+            path = os.path.join(directory, name)
+            table = pa.table({
+                'id': [row[0] for row in part_rows],
+                'objects_detected': [row[2] for row in part_rows],
+                'confidence_scores': [row[3] for row in part_rows],
+                'timestamp': [row[4] for row in part_rows],
+            }, schema=ARCHIVE_SCHEMA)
+            # Readers never see a partial file: pyarrow skips dot-files, then the rename is atomic
+            tmp_path = os.path.join(directory, f".{name}.tmp")
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+
+        self._record_max_id(max(row[0] for row in rows))
+
+    def query(self, camera_name=None, limit=100, since_id=0):
+        """Newest archived detections, scanning day partitions newest first"""
+        results = []
+        # Incremental polls are almost always past everything archived
+        if since_id and since_id >= self.max_id():
+            return results
+        for day in self.days(newest_first=True):
+            # Re-analysed video can archive high ids under old days, so check every day
+            if self.day_max_id(day, camera_name) <= since_id:
+                continue
+            dataset = ds.dataset(os.path.join(self.archive_path, f"date={day}"),
+                                 format='parquet', partitioning=CAMERA_PARTITIONING)
+            # The camera filter prunes partition directories, the id filter row groups
+            row_filter = ds.field('id') > since_id
+            if camera_name:
+                row_filter = row_filter & (ds.field('camera') == camera_name)
+            columns = dataset.to_table(filter=row_filter).to_pydict()
+            # Same ordering as the hot tier: by id for cursor reads, else by time
+            day_rows = sorted(zip(columns['id'], columns['camera'], columns['objects_detected'],
+                                  columns['confidence_scores'], columns['timestamp']),
+                              key=(lambda row: row[0]) if since_id else (lambda row: (row[4], row[0])),
+                              reverse=True)
+
+            results.extend(day_rows[:limit - len(results)])
+            if len(results) >= limit:
+                break
+        return results
+
+    def delete(self, camera_name, start, end, max_id):
+        """Remove a camera's rows timestamped start..end (inclusive) with id <= max_id"""
+        removed = 0
+        for day in self.days():
+            if not start[:10] <= day <= end[:10]:
+                continue
+            directory = os.path.join(self.archive_path, f"date={day}",
+                                     f"camera={quote(camera_name, safe='')}")
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if not (name.startswith('part-') and name.endswith('.parquet')):
+                    continue
+                # Files whose first id is above max_id can't hold matching rows
+                if int(name[len('part-'):].split('-')[0]) > max_id:
+                    continue
+                path = os.path.join(directory, name)
+                table = pq.read_table(path, schema=ARCHIVE_SCHEMA)
+                timestamps = table.column('timestamp')
+                drop = pc.and_(pc.and_(pc.greater_equal(timestamps, start), pc.less_equal(timestamps, end)),
+                               pc.less_equal(table.column('id'), max_id))
+                dropped = pc.sum(drop).as_py() or 0
+                if not dropped:
+                    continue
+                kept = table.filter(pc.invert(drop))
+                if kept.num_rows:
+                    tmp_path = os.path.join(directory, f".{name}.tmp")
+                    pq.write_table(kept, tmp_path)
+                    os.replace(tmp_path, path)
+                else:
+                    os.remove(path)
+                removed += dropped
+        return removed
+
+    def max_id(self):
+        """Highest archived detection id (0 when nothing is archived)"""
+        try:
+            with open(os.path.join(self.archive_path, MAX_ID_FILE)) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            # Missing or unreadable marker: fall back to the file names
+            return max((self.day_max_id(day) for day in self.days()), default=0)
+
+    def day_max_id(self, day, camera_name=None):
+        """Highest id archived for a day (and camera), from the part file names"""
+        day_dir = os.path.join(self.archive_path, f"date={day}")
+        if camera_name:
+            camera_dirs = [f"camera={quote(camera_name, safe='')}"]
+        else:
+            camera_dirs = os.listdir(day_dir) if os.path.isdir(day_dir) else []
+
+        highest = 0
+        for camera_dir in camera_dirs:
+            directory = os.path.join(day_dir, camera_dir)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.startswith('part-') and name.endswith('.parquet'):
+                    highest = max(highest, int(name[:-len('.parquet')].rsplit('-', 1)[1]))
+        return highest
+
+    def _record_max_id(self, max_id):
+        """Raise the shared max id marker (written atomically)"""
+        max_id = max(max_id, self.max_id())
+        path = os.path.join(self.archive_path, MAX_ID_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(max_id))
+        os.replace(tmp_path, path)
+
+    def days(self, newest_first=False):
+        """Archived day partitions as YYYY-MM-DD strings"""
+        days = [name[len('date='):] for name in os.listdir(self.archive_path) if name.startswith('date=')]
+        return sorted(days, reverse=newest_first)
+
+    def apply_retention(self, retention_days):
+        """Delete day partitions older than retention_days (0 keeps everything)"""
+        if not retention_days:
+            return 0
+        cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+        expired = [day for day in self.days() if day < cutoff]
+        for day in expired:
+            shutil.rmtree(os.path.join(self.archive_path, f"date={day}"), ignore_errors=True)
+        return len(expired)
@@ -0,0 +1,37 @@
+"""Helpers shared by benchmark.py and loadtest.py.
+
+Kept free of model imports so the load generator doesn't pull in torch.
+"""
+import cv2
+import numpy as np
+
+
+def parse_resolution(value):
+    """Parse 'WIDTHxHEIGHT' into a (width, height) tuple"""
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def make_synthetic_video(path, width, height, seconds=5, fps=30):
+    """Write a deterministic clip of moving shapes over a noisy background"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+    for i in range(seconds * fps):
+        frame = background.copy()
+        x = (i * 7) % max(width - 120, 1)
+        y = (i * 3) % max(height - 200, 1)
+        cv2.rectangle(frame, (x, y), (x + 120, y + 200), (200, 180, 160), -1)
+        cv2.circle(frame, (width - x - 60, height // 2), 40, (40, 90, 220), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
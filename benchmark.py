@@ -0,0 +1,271 @@
+"""Offline benchmark for the capture -> YOLO -> JPEG pipeline.
+
+Feeds recorded video files (or generated synthetic clips) into N virtual
+cameras through the real CameraManager, YOLODetector and DatabaseManager
+(replayed as fast as the pipeline consumes them unless --realtime),
+sweeps camera count, resolution, model/backend and batch size, and writes
+the results as JSON so runs can be compared across commits.
+
+Example:
+    python benchmark.py --cameras 1,4,8 --resolutions 640x480,1280x720 \\
+        --models yolov8n.pt,yolov8n.onnx --batch-sizes 1,4 --output bench.json
+    python benchmark.py --compare bench_main.json --output bench.json
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+
+from bench_utils import make_synthetic_video, parse_resolution, percentile
+from camera_manager import CameraManager
+from database import DatabaseManager
+from yolo_detector import YOLODetector
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def cpu_seconds():
+    """User + system CPU time consumed by this process"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_scenario(scenario):
+    """Run one benchmark scenario and return its metrics"""
+    resolution = tuple(scenario['resolution'])
+    batch_size = scenario['batch_size']
+    workdir = tempfile.mkdtemp(prefix='bench_')
+
+    db_manager = DatabaseManager(os.path.join(workdir, 'bench.db'))
+    camera_manager = CameraManager(db_manager, frame_size=resolution, realtime=scenario['realtime'])
+    detector = YOLODetector(model_path=scenario['model'], device=scenario.get('device'))
+
+    identity = {
+        'cameras': scenario['cameras'],
+        'resolution': f'{resolution[0]}x{resolution[1]}',
+        'model': scenario['model'],
+        'device': scenario.get('device'),
+        'batch_size': batch_size,
+        'realtime': scenario['realtime'],
+    }
+
+    # Warm up the model so the first measured batch isn't a cold start
+    try:
+        detector.warm_up(resolution, batch_size)
+    except Exception as e:
+        # e.g. an export with a fixed batch size of 1 run at --batch-sizes 4
+        return dict(identity, frames=0, errors=1, fps=0.0, error=f"warm-up failed: {e}")
+
+    camera_names = []
+    for i in range(scenario['cameras']):
+        name = f'Bench {i + 1}'
+        camera_manager.add_camera(name, scenario['sources'][i % len(scenario['sources'])])
+        camera_names.append(name)
+
+    # Wait for every virtual camera to connect
+    deadline = time.time() + 10
+    while time.time() < deadline and not all(camera_manager.get_camera_status(n) for n in camera_names):
+        time.sleep(0.05)
+
+    latencies = []
+    frame_ages = []
+    errors = 0
+    frames_processed = 0
+    detections_logged = 0
+    round_robin = itertools.cycle(camera_names)
+
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+    end = start + scenario['duration']
+    while time.perf_counter() < end:
+        batch = []
+        for _ in range(len(camera_names)):
+            name = next(round_robin)
+            captured_at, frame = camera_manager.get_timed_frame(name)
+            if frame is not None:
+                batch.append((name, frame, captured_at))
+                if len(batch) == batch_size:
+                    break
+        if not batch:
+            time.sleep(0.002)
+            continue
+
+        batch_start = time.perf_counter()
+        try:
+            if batch_size == 1:
+                results = [detector.detect_objects(batch[0][1], raise_errors=True)]
+            else:
+                results = detector.detect_objects_batch([frame for _, frame, _ in batch], raise_errors=True)
+        except Exception as e:
+            # A backend that can't infer must not count as fast, empty frames
+            if not errors:
+                print(f"  Inference error: {e}")
+            errors += len(batch)
+            continue
+        for (name, _, _), (annotated_frame, detections, confidences) in zip(batch, results):
+            if detections:
+                db_manager.log_detection(name, detections, confidences)
+                detections_logged += 1
+            cv2.imencode('.jpg', annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        batch_latency = time.perf_counter() - batch_start
+        done_at = time.time()
+
+        # Every frame in a batch waits for the whole batch to finish
+        latencies.extend([batch_latency] * len(batch))
+        # End-to-end age also includes the time each frame sat in its camera queue
+        frame_ages.extend(done_at - captured_at for _, _, captured_at in batch)
+        frames_processed += len(batch)
+
+    wall = time.perf_counter() - start
+    cpu = cpu_seconds() - cpu_start
+    camera_manager.stop_all_cameras()
+    fps = frames_processed / wall if wall else 0.0
+
+    return dict(identity, **{
+        # Real-time cameras deliver at most ~30 fps each, hiding faster inference
+        'capture_bound': scenario['realtime'] and fps >= 0.9 * 30 * scenario['cameras'],
+        'duration_s': round(wall, 3),
+        'frames': frames_processed,
+        'errors': errors,
+        'detections_logged': detections_logged,
+        'fps': round(fps, 2),
+        'latency_p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'latency_p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        'frame_age_p50_ms': round(percentile(frame_ages, 50) * 1000, 2) if frame_ages else None,
+        'frame_age_p99_ms': round(percentile(frame_ages, 99) * 1000, 2) if frame_ages else None,
+        'cpu_percent': round(100.0 * cpu / wall, 1) if wall else 0.0,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    })
+
+
+def scenario_key(result):
+    """Identity of a scenario for --compare"""
+    return (result['cameras'], result['resolution'], result['model'], result.get('device'),
+            result['batch_size'], result.get('realtime', True))
+
+
+def compare_results(baseline_path, results, tolerance):
+    """Print fps / p99 deltas against a baseline file and return the regressions (incl. failed scenarios)"""
+    with open(baseline_path) as f:
+        baseline = {scenario_key(r): r for r in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        if result.get('errors'):
+            regressions.append(result)
+            continue
+        base = baseline.get(scenario_key(result))
+        if not base or not base['fps']:
+            continue
+        fps_change = (result['fps'] - base['fps']) / base['fps']
+        print(f"{scenario_key(result)}: fps {base['fps']} -> {result['fps']} ({fps_change:+.1%}), "
+              f"p99 {base['latency_p99_ms']} -> {result['latency_p99_ms']} ms")
+        if fps_change < -tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline surveillance pipeline benchmark')
+    parser.add_argument('--videos', nargs='*', default=[],
+                        help='Video files to replay; synthetic clips are generated when omitted')
+    parser.add_argument('--cameras', default='1,4', help='Comma-separated virtual camera counts')
+    parser.add_argument('--resolutions', default='640x480', help='Comma-separated WIDTHxHEIGHT values')
+    parser.add_argument('--models', default='yolov8n.pt',
+                        help='Comma-separated model files (e.g. .pt, .onnx, _openvino_model)')
+    parser.add_argument('--batch-sizes', default='1', help='Comma-separated inference batch sizes')
+    parser.add_argument('--device', default=None, help='Inference device passed to YOLO (cpu, 0, ...)')
+    parser.add_argument('--realtime', action='store_true',
+                        help='Pace virtual cameras at ~30 fps like live cameras (default: replay as fast as consumed)')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds to measure per scenario')
+    parser.add_argument('--output', default='bench_results.json', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Baseline results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Allowed fractional fps drop before --compare reports a regression')
+    args = parser.parse_args()
+
+    resolutions = [parse_resolution(r) for r in args.resolutions.split(',')]
+    clip_dir = tempfile.mkdtemp(prefix='bench_clips_')
+
+    scenarios = []
+    for cameras, resolution, model, batch_size in itertools.product(
+            [int(c) for c in args.cameras.split(',')], resolutions,
+            args.models.split(','), [int(b) for b in args.batch_sizes.split(',')]):
+        sources = args.videos or [make_synthetic_video(
+            os.path.join(clip_dir, f'synthetic_{resolution[0]}x{resolution[1]}.avi'), *resolution)]
+        scenarios.append({
+            'cameras': cameras,
+            'resolution': resolution,
+            'model': model,
+            'batch_size': batch_size,
+            'device': args.device,
+            'realtime': args.realtime,
+            'duration': args.duration,
+            'sources': sources,
+        })
+
+    results = []
+    # A fresh process per scenario keeps peak RSS and model state independent
+    ctx = multiprocessing.get_context('spawn')
+    for scenario in scenarios:
+        print(f"Running {scenario['cameras']} camera(s) @ {scenario['resolution']} "
+              f"model={scenario['model']} batch={scenario['batch_size']}...")
+        with ctx.Pool(1) as pool:
+            result = pool.apply(run_scenario, (scenario,))
+        results.append(result)
+        if result.get('error'):
+            print(f"  ❌ {result['error']}")
+            continue
+        print(f"  {result['fps']} fps{' (capture-bound)' if result['capture_bound'] else ''}, "
+              f"p50 {result['latency_p50_ms']} ms, p99 {result['latency_p99_ms']} ms, "
+              f"frame age p99 {result['frame_age_p99_ms']} ms, "
+              f"CPU {result['cpu_percent']}%, RSS {result['peak_rss_mb']} MB")
+        if result['errors']:
+            print(f"  ❌ {result['errors']} frame(s) failed inference")
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare_results(args.compare, results, args.tolerance)
+        if regressions:
+            print(f"⚠️ {len(regressions)} scenario(s) regressed by more than {args.tolerance:.0%} or failed")
+            sys.exit(1)
+    elif any(result['errors'] for result in results):
+        print("❌ Some scenarios had inference errors")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,55 @@
 import cv2
 import threading
 import time
-from queue import Queue
+from queue import Queue, Full
 import requests
 from config import Config
 from database import DatabaseManager
 
 class CameraManager:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, frame_size=None, event_bus=None, realtime=True):
         self.cameras = {}
         self.camera_threads = {}
         self.camera_queues = {}
+        self.camera_online = {}
+        self.latest_frames = {}  # name -> (sequence number, frame), read without consuming
+        self.camera_stops = {}
         self.db_manager = db_manager
+        self.event_bus = event_bus
         self.running = True
+        self.frame_size = frame_size  # (width, height); None keeps the default capture size
+        self.realtime = realtime  # False replays sources as fast as frames are consumed
         
     def add_camera(self, name, url):
         """Add a new camera"""
         if name not in self.cameras:
             self.cameras[name] = url
             self.camera_queues[name] = Queue(maxsize=2)
+            self.camera_stops[name] = threading.Event()
             self.start_camera_thread(name, url)
     
+    def remove_camera(self, name):
+        """Stop capturing a camera, e.g. when it is reassigned to another worker"""
+        if name in self.cameras:
+            self.camera_stops.pop(name).set()
+            del self.cameras[name]
+            del self.camera_queues[name]
+            self.camera_threads.pop(name, None)
+            self.camera_online.pop(name, None)
+            self.latest_frames.pop(name, None)
+    
     def start_camera_thread(self, name, url):
         """Start camera capture thread"""
+        stop = self.camera_stops[name]
+        frame_queue = self.camera_queues[name]
+        
         def capture_frames():
             cap = None
+            frame_seq = 0
             retry_count = 0
             max_retries = 5
             
-            while self.running and retry_count < max_retries:
+            while self.running and not stop.is_set() and retry_count < max_retries:
                 try:
                     # Initialize camera
                     if isinstance(url, int):  # Webcam
@@ -40,26 +61,45 @@ class CameraManager:
                         raise Exception(f"Cannot open camera {name}")
                     
                     # Set camera properties
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+                    width, height = self.frame_size or (640, 480)
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
                     cap.set(cv2.CAP_PROP_FPS, 30)
                     
-                    self.db_manager.update_camera_status(name, 'online')
+                    self.set_camera_online(name, True)
                     retry_count = 0
                     
-                    while self.running:
+                    while self.running and not stop.is_set():
                         ret, frame = cap.read()
                         if not ret:
                             break
                         
+                        # Video files ignore CAP_PROP_FRAME_*, so resize explicitly
+                        if self.frame_size and (frame.shape[1], frame.shape[0]) != tuple(self.frame_size):
+                            frame = cv2.resize(frame, tuple(self.frame_size))
+                        
+                        frame_seq += 1
+                        self.latest_frames[name] = (frame_seq, frame)
+                        
+                        item = (time.time(), frame)
+                        if not self.realtime:
+                            # Block until the consumer takes a frame instead of pacing at 30 FPS
+                            while self.running and not stop.is_set():
+                                try:
+                                    frame_queue.put(item, timeout=0.5)
+                                    break
+                                except Full:
+                                    pass
+                            continue
+                        
                         # Add frame to queue (non-blocking)
-                        if not self.camera_queues[name].full():
-                            self.camera_queues[name].put(frame)
+                        if not frame_queue.full():
+                            frame_queue.put(item)
                         else:
                             # Remove old frame and add new one
                             try:
-                                self.camera_queues[name].get_nowait()
-                                self.camera_queues[name].put(frame)
+                                frame_queue.get_nowait()
+                                frame_queue.put(item)
                             except:
                                 pass
                         
@@ -67,34 +107,50 @@ class CameraManager:
                 
                 except Exception as e:
                     print(f"Camera {name} error: {e}")
-                    self.db_manager.update_camera_status(name, 'offline')
+                    self.set_camera_online(name, False)
                     retry_count += 1
-                    time.sleep(5)  # Wait before retry
+                    stop.wait(5)  # Wait before retry
                 
                 finally:
                     if cap:
                         cap.release()
             
-            self.db_manager.update_camera_status(name, 'offline')
+            # A removed camera now belongs to someone else; don't report it offline
+            if not stop.is_set():
+                self.set_camera_online(name, False)
         
         thread = threading.Thread(target=capture_frames, daemon=True)
         thread.start()
         self.camera_threads[name] = thread
     
+    def set_camera_online(self, camera_name, online):
+        """Record camera connection state and publish changes"""
+        self.db_manager.update_camera_status(camera_name, 'online' if online else 'offline')
+        changed = self.camera_online.get(camera_name) != online
+        self.camera_online[camera_name] = online
+        if changed and self.event_bus:
+            self.event_bus.publish('camera_status', {'camera': camera_name, 'online': online})
+    
     def get_frame(self, camera_name):
         """Get latest frame from camera"""
+        return self.get_timed_frame(camera_name)[1]
+    
+    def get_timed_frame(self, camera_name):
+        """Get (capture time, frame) of the latest queued frame, or (None, None)"""
         if camera_name in self.camera_queues:
             try:
                 return self.camera_queues[camera_name].get_nowait()
             except:
-                return None
-        return None
+                return None, None
+        return None, None
+    
+    def get_latest_frame(self, camera_name):
+        """Get (sequence number, frame) of the newest frame without consuming it"""
+        return self.latest_frames.get(camera_name, (None, None))
     
     def get_camera_status(self, camera_name):
         """Get camera status"""
-        if camera_name in self.cameras:
-            return not self.camera_queues[camera_name].empty()
-        return False
+        return self.camera_online.get(camera_name, False)
     
     def stop_all_cameras(self):
         """Stop all camera threads"""
@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,9 +9,11 @@ class Config:
     FLASK_HOST = os.getenv('FLASK_HOST', 'localhost')
     FLASK_PORT = int(os.getenv('FLASK_PORT', 5001))
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
+    STARTUP_TIMEOUT = int(os.getenv('STARTUP_TIMEOUT', 120))  # seconds app.py waits for /ready
     
     # Camera Configuration
-    CAMERA_URLS = {
+    # Override with a JSON object, e.g. CAMERA_URLS='{"Lobby": "recordings/lobby.mp4"}'
+    CAMERA_URLS = json.loads(os.getenv('CAMERA_URLS', 'null')) or {
         'Camera 1': 'http://192.168.1.100:8080/video',
         'Camera 2': 'http://192.168.1.101:8080/video',
         'Camera 3': 'http://192.168.1.102:8080/video',
@@ -18,17 +21,47 @@ class Config:
         'Demo Camera': 0  # Use webcam for demo
     }
     
+    # Sharding Configuration (leave COORDINATOR_URL unset to run a single backend)
+    COORDINATOR_HOST = os.getenv('COORDINATOR_HOST', 'localhost')
+    COORDINATOR_PORT = int(os.getenv('COORDINATOR_PORT', 5050))
+    COORDINATOR_URL = os.getenv('COORDINATOR_URL')
+    WORKER_URL = os.getenv('WORKER_URL', f"http://{FLASK_HOST}:{FLASK_PORT}")
+    WORKER_ID = os.getenv('WORKER_ID', WORKER_URL)
+    HEARTBEAT_INTERVAL = 2  # seconds between worker heartbeats
+    WORKER_TIMEOUT = 10  # seconds without a heartbeat before a worker's cameras move
+    HASH_RING_REPLICAS = 100  # virtual nodes per worker on the hash ring
+    
     # YOLO Configuration
     YOLO_MODEL_PATH = 'yolov8n.pt'
     CONFIDENCE_THRESHOLD = 0.5
     
     # Database Configuration
-    DATABASE_PATH = 'surveillance.db'
+    DATABASE_PATH = os.getenv('DATABASE_PATH', 'surveillance.db')
+    
+    # Retention Configuration (hot tier = SQLite, archive tier = Parquet files)
+    ARCHIVE_PATH = os.getenv('ARCHIVE_PATH', 'archive/')
+    HOT_RETENTION_HOURS = 72  # detections older than this move to the archive
+    ARCHIVE_RETENTION_DAYS = 365  # archived days older than this are deleted (0 = keep forever)
+    COMPACTION_INTERVAL = 3600  # seconds between compaction runs
+    # Only one process may compact a shared database/archive; sharded workers
+    # leave it to the one started with RUN_COMPACTION=1
+    RUN_COMPACTION = os.getenv('RUN_COMPACTION', '0' if COORDINATOR_URL else '1') == '1'
     
     # Authentication
     ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
     ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
     
+    # Snapshot Configuration
+    SNAPSHOT_JPEG_QUALITY = 80
+    THUMBNAIL_WIDTH = 320
+    SNAPSHOT_WIDTHS = (160, 320, 640, 1280)  # allowed ?width= values for /snapshot
+    
+    # Frontend Configuration
+    STATUS_CACHE_TTL = 2  # seconds camera status is shared across dashboard sessions
+    DATAFRAME_CACHE_TTL = 60  # seconds derived detection DataFrames are cached
+    EVENT_KEEPALIVE_INTERVAL = 15  # seconds between /events keepalive comments
+    
     # Recording Configuration
     RECORDING_PATH = 'recordings/'
     MAX_RECORDING_DURATION = 3600  # 1 hour in seconds
+    REANALYSIS_CHECKPOINT_PATH = 'reanalysis_checkpoints/'
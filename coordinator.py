@@ -0,0 +1,391 @@
+"""Shard coordinator and routing layer for multiple flask_backend workers.
+
+Workers started with COORDINATOR_URL set register here through periodic
+heartbeats. Cameras from Config.CAMERA_URLS are assigned to live workers
+by consistent hashing, so a worker joining or dying only moves the cameras
+it gains or loses. The coordinator also serves the same API as a single
+backend and proxies or fans out each call to the owning shard(s), so the
+Streamlit frontend can point at it unchanged.
+
+Detection ids are per-worker database ids. Workers on one machine share
+Config.DATABASE_PATH by default, which keeps ids (and ?since_id= cursors)
+global; workers with separate databases should be queried without cursors.
+
+Local test with three worker processes:
+
+    python coordinator.py --local-workers 3
+    FLASK_PORT=5050 streamlit run streamlit_frontend.py
+"""
+import argparse
+import bisect
+import hashlib
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+import requests
+from flask import Flask, Response, jsonify, request
+
+from config import Config
+from event_bus import EventBus
+
+app = Flask(__name__)
+app.config['SECRET_KEY'] = Config.SECRET_KEY
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes"""
+
+    def __init__(self, replicas=Config.HASH_RING_REPLICAS):
+        self.replicas = replicas
+        self.keys = []
+        self.nodes = {}
+
+    @staticmethod
+    def _hash(value):
+        """Stable 128-bit position on the ring"""
+        return int(hashlib.md5(value.encode('utf-8')).hexdigest(), 16)
+
+    def add_node(self, node):
+        """Place a node's virtual points on the ring"""
+        for i in range(self.replicas):
+            key = self._hash(f"{node}#{i}")
+            self.nodes[key] = node
+            bisect.insort(self.keys, key)
+
+    def remove_node(self, node):
+        """Remove a node's virtual points from the ring"""
+        for i in range(self.replicas):
+            key = self._hash(f"{node}#{i}")
+            if self.nodes.pop(key, None) is not None:
+                self.keys.remove(key)
+
+    def get_node(self, item):
+        """Return the node owning item, or None if the ring is empty"""
+        if not self.keys:
+            return None
+        index = bisect.bisect(self.keys, self._hash(item)) % len(self.keys)
+        return self.nodes[self.keys[index]]
+
+
+class ShardCoordinator:
+    """Tracks live workers and which cameras each one owns"""
+
+    def __init__(self, cameras, event_bus):
+        self.cameras = cameras
+        self.event_bus = event_bus
+        self.ring = HashRing()
+        self.workers = {}  # worker_id -> {'url': ..., 'last_seen': ...}
+        self.camera_status = {}
+        self.relays = set()  # workers with a running event relay thread
+        self.lock = threading.Lock()
+
+    def heartbeat(self, worker_id, url):
+        """Record a worker heartbeat and return its camera assignment"""
+        with self.lock:
+            joined = worker_id not in self.workers
+            if joined:
+                self.ring.add_node(worker_id)
+            self.workers[worker_id] = {'url': url.rstrip('/'), 'last_seen': time.time()}
+            start_relay = worker_id not in self.relays
+            self.relays.add(worker_id)
+        if joined:
+            print(f"Worker {worker_id} joined ({url})")
+        if start_relay:
+            threading.Thread(target=self.relay_events, args=(worker_id,), daemon=True).start()
+        return self.assignment(worker_id)
+
+    def remove_stale_workers(self):
+        """Drop workers whose heartbeats stopped; their cameras rehash on the next heartbeats"""
+        cutoff = time.time() - Config.WORKER_TIMEOUT
+        with self.lock:
+            stale = [w for w, info in self.workers.items() if info['last_seen'] < cutoff]
+            for worker_id in stale:
+                self.ring.remove_node(worker_id)
+                del self.workers[worker_id]
+        for worker_id in stale:
+            print(f"Worker {worker_id} timed out, rebalancing its cameras")
+
+    def assignment(self, worker_id):
+        """Cameras (name -> source URL) owned by a worker"""
+        with self.lock:
+            return {name: url for name, url in self.cameras.items()
+                    if self.ring.get_node(name) == worker_id}
+
+    def owner_url(self, camera_name):
+        """Base URL of the worker owning a camera, or None"""
+        with self.lock:
+            worker_id = self.ring.get_node(camera_name)
+            return self.workers[worker_id]['url'] if worker_id else None
+
+    def worker_urls(self):
+        """Base URLs of all live workers"""
+        with self.lock:
+            return [info['url'] for info in self.workers.values()]
+
+    def shards(self):
+        """Worker -> owned camera names, for /ready"""
+        with self.lock:
+            owned = {worker_id: [] for worker_id in self.workers}
+            for name in self.cameras:
+                worker_id = self.ring.get_node(name)
+                if worker_id:
+                    owned[worker_id].append(name)
+            return {worker_id: {'url': self.workers[worker_id]['url'], 'cameras': names}
+                    for worker_id, names in owned.items()}
+
+    def relay_events(self, worker_id):
+        """Republish a worker's /events stream on the coordinator's event bus"""
+        while True:
+            with self.lock:
+                info = self.workers.get(worker_id)
+                if info is None:
+                    self.relays.discard(worker_id)
+                    return
+            parts = urlsplit(info['url'])
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=Config.WORKER_TIMEOUT * 2)
+            try:
+                connection.request('GET', '/events')
+                response = connection.getresponse()
+                event_type = None
+                while True:
+                    line = response.readline()
+                    if not line:
+                        break
+                    line = line.decode('utf-8').rstrip('\r\n')
+                    if line.startswith('event:'):
+                        event_type = line[len('event:'):].strip()
+                    elif line.startswith('data:') and event_type:
+                        self.handle_event(event_type, json.loads(line[len('data:'):]))
+                        event_type = None
+            except Exception as e:
+                print(f"Event relay from {worker_id} interrupted: {e}")
+            finally:
+                connection.close()
+            time.sleep(Config.HEARTBEAT_INTERVAL)
+
+    def handle_event(self, event_type, data):
+        """Track relayed camera status and forward events to dashboard clients"""
+        if event_type == 'snapshot':
+            self.camera_status.update(data['status'])
+        elif event_type == 'camera_status':
+            self.camera_status[data['camera']] = data['online']
+            self.event_bus.publish(event_type, data)
+        else:
+            self.event_bus.publish(event_type, data)
+
+
+event_bus = EventBus()
+coordinator = ShardCoordinator(Config.CAMERA_URLS, event_bus)
+http_session = requests.Session()
+fan_out_pool = ThreadPoolExecutor(max_workers=16)
+
+
+def run_reaper():
+    """Periodically remove workers that stopped sending heartbeats"""
+    while True:
+        time.sleep(Config.HEARTBEAT_INTERVAL)
+        coordinator.remove_stale_workers()
+
+
+threading.Thread(target=run_reaper, daemon=True).start()
+
+
+def fan_out(path, params=None):
+    """GET path from every worker concurrently and return the JSON bodies that succeeded"""
+    def fetch(url):
+        try:
+            response = http_session.get(f"{url}{path}", params=params, timeout=5)
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            print(f"Shard request to {url}{path} failed: {e}")
+        return None
+
+    return [body for body in fan_out_pool.map(fetch, coordinator.worker_urls()) if body is not None]
+
+
+def merge_history(responses, limit, by_id=False):
+    """Merge per-shard detection rows, newest first (highest id first for cursor reads)"""
+    # Workers sharing one database all return the same rows; keep one copy of each
+    unique = {(row[0], row[1]): row for rows in responses for row in rows}
+    rows = sorted(unique.values(), key=(lambda row: row[0]) if by_id else (lambda row: (row[4], row[0])),
+                  reverse=True)
+    return rows[:limit]
+
+
+@app.route('/workers/heartbeat', methods=['POST'])
+def worker_heartbeat():
+    """Worker registration / heartbeat; returns the cameras the worker owns"""
+    data = request.get_json(force=True)
+    cameras = coordinator.heartbeat(data['worker_id'], data['url'])
+    return jsonify({'cameras': cameras})
+
+
+@app.route('/video_feed/<camera_name>')
+def video_feed(camera_name):
+    """Proxy the MJPEG stream from the worker owning the camera"""
+    if camera_name not in Config.CAMERA_URLS:
+        return jsonify({'error': 'Camera not found'}), 404
+    worker_url = coordinator.owner_url(camera_name)
+    if worker_url is None:
+        return jsonify({'error': 'No workers available'}), 503
+
+    parts = urlsplit(worker_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    try:
+        connection.request('GET', f"/video_feed/{quote(camera_name)}")
+        upstream = connection.getresponse()
+    except Exception as e:
+        connection.close()
+        return jsonify({'error': f'Worker unavailable: {e}'}), 502
+
+    def stream():
+        try:
+            while True:
+                chunk = upstream.read1(65536)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            connection.close()
+
+    return Response(stream(), status=upstream.status,
+                    content_type=upstream.getheader('Content-Type'))
+
+
+def proxy_image(camera_name, path):
+    """Forward a snapshot/thumbnail request (and its ETag) to the owning worker"""
+    if camera_name not in Config.CAMERA_URLS:
+        return jsonify({'error': 'Camera not found'}), 404
+    worker_url = coordinator.owner_url(camera_name)
+    if worker_url is None:
+        return jsonify({'error': 'No workers available'}), 503
+
+    headers = {}
+    if request.headers.get('If-None-Match'):
+        headers['If-None-Match'] = request.headers['If-None-Match']
+    try:
+        upstream = http_session.get(f"{worker_url}{path}", params=request.args, headers=headers, timeout=5)
+    except requests.RequestException as e:
+        return jsonify({'error': f'Worker unavailable: {e}'}), 502
+
+    response = Response(upstream.content, status=upstream.status_code,
+                        content_type=upstream.headers.get('Content-Type'))
+    for header in ('ETag', 'Cache-Control'):
+        if header in upstream.headers:
+            response.headers[header] = upstream.headers[header]
+    return response
+
+
+@app.route('/snapshot/<camera_name>')
+def snapshot(camera_name):
+    """Proxy a still frame from the owning worker"""
+    return proxy_image(camera_name, f"/snapshot/{quote(camera_name)}")
+
+
+@app.route('/thumbnail/<camera_name>')
+def thumbnail(camera_name):
+    """Proxy a thumbnail from the owning worker"""
+    return proxy_image(camera_name, f"/thumbnail/{quote(camera_name)}")
+
+
+@app.route('/camera_status')
+def camera_status():
+    """Merge camera status from every shard"""
+    status = {camera_name: False for camera_name in Config.CAMERA_URLS.keys()}
+    for shard_status in fan_out('/camera_status'):
+        status.update(shard_status)
+    return jsonify(status)
+
+
+@app.route('/detection_history/<camera_name>')
+def detection_history(camera_name):
+    """Detection history for a camera, merged across shards (it may have moved)"""
+    params = {'since_id': request.args.get('since_id', 0, type=int)}
+    return jsonify(merge_history(fan_out(f"/detection_history/{quote(camera_name)}", params), 50,
+                                 by_id=bool(params['since_id'])))
+
+
+@app.route('/all_detection_history')
+def all_detection_history():
+    """Detection history for all cameras, merged across shards"""
+    params = {'since_id': request.args.get('since_id', 0, type=int)}
+    return jsonify(merge_history(fan_out('/all_detection_history', params), 100,
+                                 by_id=bool(params['since_id'])))
+
+
+@app.route('/events')
+def events():
+    """Combined server-sent event stream of all shards"""
+    return event_bus.sse_response(
+        lambda: {name: coordinator.camera_status.get(name, False) for name in Config.CAMERA_URLS})
+
+
+@app.route('/health')
+def health():
+    """Health check endpoint"""
+    return jsonify({'status': 'healthy', 'timestamp': time.time()})
+
+
+@app.route('/ready')
+def ready():
+    """Ready once every shard reports ready; lists which worker owns which camera"""
+    shards = coordinator.shards()
+    workers_ready = {}
+    for worker_id, shard in shards.items():
+        try:
+            workers_ready[worker_id] = http_session.get(f"{shard['url']}/ready", timeout=2).status_code == 200
+        except requests.RequestException:
+            workers_ready[worker_id] = False
+    is_ready = bool(shards) and all(workers_ready.values())
+    return jsonify({
+        'ready': is_ready,
+        'components': {
+            'workers': {worker_id: dict(shard, ready=workers_ready[worker_id])
+                        for worker_id, shard in shards.items()}
+        }
+    }), 200 if is_ready else 503
+
+
+def spawn_local_workers(count, base_port):
+    """Start count flask_backend.py workers on consecutive local ports"""
+    coordinator_url = f"http://{Config.COORDINATOR_HOST}:{Config.COORDINATOR_PORT}"
+    processes = []
+    for i in range(count):
+        port = base_port + i
+        env = dict(os.environ,
+                   COORDINATOR_URL=coordinator_url,
+                   FLASK_PORT=str(port),
+                   WORKER_URL=f"http://{Config.FLASK_HOST}:{port}",
+                   WORKER_ID=f"worker-{i + 1}",
+                   # The workers share one database and archive; only the first compacts them
+                   RUN_COMPACTION='1' if i == 0 else '0')
+        processes.append(subprocess.Popen([sys.executable, 'flask_backend.py'], env=env,
+                                          cwd=os.path.dirname(os.path.abspath(__file__))))
+    return processes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Camera shard coordinator and router')
+    parser.add_argument('--local-workers', type=int, default=0,
+                        help='Spawn this many local flask_backend.py workers for testing')
+    parser.add_argument('--worker-base-port', type=int, default=Config.FLASK_PORT + 1,
+                        help='First port used by --local-workers')
+    args = parser.parse_args()
+
+    workers = spawn_local_workers(args.local_workers, args.worker_base_port)
+    try:
+        print(f"Starting coordinator on {Config.COORDINATOR_HOST}:{Config.COORDINATOR_PORT}")
+        app.run(host=Config.COORDINATOR_HOST, port=Config.COORDINATOR_PORT, debug=False, threaded=True)
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        for process in workers:
+            process.terminate()
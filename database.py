@@ -1,11 +1,13 @@
 import sqlite3
 import bcrypt
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
+from archive import DetectionArchive
 
 class DatabaseManager:
-    def __init__(self, db_path):
+    def __init__(self, db_path, archive_path=None):
         self.db_path = db_path
+        self.archive = DetectionArchive(archive_path) if archive_path else None
         self.init_database()
     
     def init_database(self):
@@ -44,11 +46,21 @@ class DatabaseManager:
             )
         ''')
         
-        # Create default admin user
-        self.create_user('admin', 'admin123')
+        # Index used by incremental (since_id) and per-camera history queries
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_detection_logs_camera
+            ON detection_logs (camera_name, timestamp)
+        ''')
         
         conn.commit()
+        
+        # Create default admin user; skip the (deliberately slow) bcrypt hash if it exists
+        cursor.execute('SELECT 1 FROM users WHERE username = ?', ('admin',))
+        admin_exists = cursor.fetchone() is not None
         conn.close()
+        
+        if not admin_exists:
+            self.create_user('admin', 'admin123')
     
     def create_user(self, username, password):
         """Create a new user"""
@@ -88,7 +100,7 @@ class DatabaseManager:
             return False
     
     def log_detection(self, camera_name, objects, confidences):
-        """Log object detection results"""
+        """Log object detection results and return the new row id"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
@@ -97,11 +109,76 @@ class DatabaseManager:
                 INSERT INTO detection_logs (camera_name, objects_detected, confidence_scores)
                 VALUES (?, ?, ?)
             ''', (camera_name, json.dumps(objects), json.dumps(confidences)))
+            row_id = cursor.lastrowid
             
             conn.commit()
             conn.close()
+            return row_id
         except Exception as e:
             print(f"Error logging detection: {e}")
+            return None
+    
+    def log_detections_bulk(self, rows):
+        """Log many detections in one transaction.
+        
+        rows are (camera_name, objects, confidences, timestamp) tuples, with
+        timestamp as a UTC 'YYYY-MM-DD HH:MM:SS' string. Returns True on success.
+        """
+        try:
+            # Longer busy timeout: several backfill workers may write at once
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            cursor = conn.cursor()
+            
+            cursor.executemany('''
+                INSERT INTO detection_logs (camera_name, objects_detected, confidence_scores, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', [(camera_name, json.dumps(objects), json.dumps(confidences), timestamp)
+                  for camera_name, objects, confidences, timestamp in rows])
+            
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"Error logging detections in bulk: {e}")
+            return False
+    
+    def last_detection_id(self):
+        """Highest detection id ever assigned, including rows since moved to the archive"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            # AUTOINCREMENT never reuses ids, so sqlite_sequence is the true high-water mark
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'detection_logs'")
+            row = cursor.fetchone()
+            conn.close()
+            return row[0] if row else 0
+        except Exception as e:
+            print(f"Error getting last detection id: {e}")
+            return None
+    
+    def delete_detections(self, camera_name, start, end, max_id):
+        """Delete a camera's detections timestamped start..end (inclusive) with id <= max_id.
+        
+        Covers both the database and the archive tier. Returns the number of
+        rows removed, or None on error.
+        """
+        try:
+            removed = self.archive.delete(camera_name, start, end, max_id) if self.archive else 0
+            
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            cursor = conn.cursor()
+            cursor.execute('''
+                DELETE FROM detection_logs
+                WHERE camera_name = ? AND timestamp BETWEEN ? AND ? AND id <= ?
+            ''', (camera_name, start, end, max_id))
+            removed += cursor.rowcount
+            conn.commit()
+            conn.close()
+            return removed
+        except Exception as e:
+            print(f"Error deleting detections: {e}")
+            return None
     
     def update_camera_status(self, camera_name, status):
         """Update camera status"""
@@ -119,29 +196,75 @@ class DatabaseManager:
         except Exception as e:
             print(f"Error updating camera status: {e}")
     
-    def get_detection_history(self, camera_name=None, limit=100):
-        """Get detection history"""
+    def get_detection_history(self, camera_name=None, limit=100, since_id=0):
+        """Get detection history, optionally only rows with id > since_id"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
+            # Cursor reads take the highest ids so max(id) never skips a row;
+            # ids are assigned in insert order, timestamps may be back-dated
+            order = 'id DESC' if since_id else 'timestamp DESC'
             if camera_name:
-                cursor.execute('''
+                cursor.execute(f'''
                     SELECT * FROM detection_logs 
-                    WHERE camera_name = ? 
-                    ORDER BY timestamp DESC 
+                    WHERE camera_name = ? AND id > ?
+                    ORDER BY {order} 
                     LIMIT ?
-                ''', (camera_name, limit))
+                ''', (camera_name, since_id, limit))
             else:
-                cursor.execute('''
+                cursor.execute(f'''
                     SELECT * FROM detection_logs 
-                    ORDER BY timestamp DESC 
+                    WHERE id > ?
+                    ORDER BY {order} 
                     LIMIT ?
-                ''', (limit,))
+                ''', (since_id, limit))
             
             results = cursor.fetchall()
             conn.close()
-            return results
         except Exception as e:
             print(f"Error getting detection history: {e}")
             return []
+        
+        # Older rows live in the archive tier; top up from there if needed
+        if self.archive and len(results) < limit:
+            try:
+                results += self.archive.query(camera_name, limit - len(results), since_id)
+            except Exception as e:
+                # Still return the hot rows if the archive can't be read
+                print(f"Error reading detection archive: {e}")
+        return results
+    
+    def compact_detections(self, hot_hours, batch_size=10000):
+        """Move detections older than hot_hours from SQLite into the archive tier"""
+        if not self.archive:
+            return 0
+        
+        cutoff = (datetime.utcnow() - timedelta(hours=hot_hours)).strftime('%Y-%m-%d %H:%M:%S')
+        moved = 0
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            while True:
+                cursor.execute('''
+                    SELECT * FROM detection_logs
+                    WHERE timestamp < ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (cutoff, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                
+                # Write the archive first so a crash can only duplicate, never lose, rows
+                self.archive.write(rows)
+                cursor.execute('DELETE FROM detection_logs WHERE id BETWEEN ? AND ? AND timestamp < ?',
+                               (rows[0][0], rows[-1][0], cutoff))
+                conn.commit()
+                moved += len(rows)
+            
+            conn.close()
+        except Exception as e:
+            print(f"Error compacting detections: {e}")
+        return moved
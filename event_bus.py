@@ -0,0 +1,74 @@
+import json
+import threading
+from queue import Queue, Full, Empty
+from flask import Response
+from config import Config
+
+class EventBus:
+    """In-process publish/subscribe hub feeding the /events stream"""
+    
+    def __init__(self, max_queue=100):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.max_queue = max_queue
+    
+    def subscribe(self):
+        """Register a new subscriber and return its event queue"""
+        queue = Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.subscribers.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue):
+        """Remove a subscriber queue"""
+        with self.lock:
+            self.subscribers.discard(queue)
+    
+    def publish(self, event_type, data):
+        """Send an event to every subscriber without blocking the publisher"""
+        event = (event_type, data)
+        with self.lock:
+            subscribers = list(self.subscribers)
+        
+        for queue in subscribers:
+            try:
+                queue.put_nowait(event)
+            except Full:
+                # Slow client: drop its oldest event instead of stalling cameras
+                try:
+                    queue.get_nowait()
+                    queue.put_nowait(event)
+                except (Empty, Full):
+                    pass
+    
+    def sse_response(self, snapshot_status):
+        """Flask response streaming a status snapshot followed by live events.
+        
+        snapshot_status() returns {camera_name: online} and is called once the
+        client is subscribed, so no change between the two is missed.
+        """
+        def stream():
+            queue = self.subscribe()
+            try:
+                yield self.format_sse('snapshot', {'status': snapshot_status()})
+                while True:
+                    try:
+                        event_type, data = queue.get(timeout=Config.EVENT_KEEPALIVE_INTERVAL)
+                        yield self.format_sse(event_type, data)
+                    except Empty:
+                        # Comment line keeps proxies and the browser from timing out
+                        yield ': keepalive\n\n'
+            finally:
+                self.unsubscribe(queue)
+        
+        response = Response(stream(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        # The dashboard subscribes from a component iframe on another origin
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+    
+    @staticmethod
+    def format_sse(event_type, data):
+        """Encode an event in text/event-stream format"""
+        return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
@@ -2,36 +2,109 @@ from flask import Flask, Response, jsonify, request
 import cv2
 import threading
 import time
+from datetime import datetime
 from config import Config
-from yolo_detector import YOLODetector
 from camera_manager import CameraManager
 from database import DatabaseManager
+from event_bus import EventBus
+from snapshot_cache import SnapshotCache
 import json
+import requests
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = Config.SECRET_KEY
 
 # Initialize components
-db_manager = DatabaseManager(Config.DATABASE_PATH)
-yolo_detector = YOLODetector()
-camera_manager = CameraManager(db_manager)
+db_manager = DatabaseManager(Config.DATABASE_PATH, archive_path=Config.ARCHIVE_PATH)
+event_bus = EventBus()
+camera_manager = CameraManager(db_manager, event_bus=event_bus)
+snapshot_cache = SnapshotCache(camera_manager)
 
-# Initialize cameras
-for name, url in Config.CAMERA_URLS.items():
-    camera_manager.add_camera(name, url)
+# The model is loaded in the background so the HTTP server can answer
+# immediately; /ready reports when it is warm.
+yolo_detector = None
+model_state = 'loading'
+
+def load_model():
+    """Load the YOLO model and run a warm-up inference"""
+    global yolo_detector, model_state
+    try:
+        # Imported here so the torch/ultralytics import doesn't delay startup
+        from yolo_detector import YOLODetector
+        detector = YOLODetector()
+        model_state = 'warming_up'
+        detector.warm_up()
+        yolo_detector = detector
+        model_state = 'ready'
+    except Exception as e:
+        print(f"Error loading YOLO model: {e}")
+        model_state = 'failed'
+
+threading.Thread(target=load_model, daemon=True).start()
+
+def run_compaction():
+    """Periodically move old detections to the archive and enforce retention"""
+    while True:
+        moved = db_manager.compact_detections(Config.HOT_RETENTION_HOURS)
+        expired = db_manager.archive.apply_retention(Config.ARCHIVE_RETENTION_DAYS)
+        if moved or expired:
+            print(f"Compaction: archived {moved} detections, removed {expired} expired day(s)")
+        time.sleep(Config.COMPACTION_INTERVAL)
+
+if Config.RUN_COMPACTION:
+    threading.Thread(target=run_compaction, daemon=True).start()
+
+def run_worker_heartbeat():
+    """Register with the coordinator and keep the assigned cameras in sync"""
+    while True:
+        try:
+            response = requests.post(f"{Config.COORDINATOR_URL}/workers/heartbeat", json={
+                'worker_id': Config.WORKER_ID,
+                'url': Config.WORKER_URL
+            }, timeout=5)
+            response.raise_for_status()
+            assigned = response.json()['cameras']
+            
+            for name in list(camera_manager.cameras):
+                if name not in assigned:
+                    camera_manager.remove_camera(name)
+            for name, url in assigned.items():
+                camera_manager.add_camera(name, url)
+        except Exception as e:
+            # Keep the current cameras; the coordinator reassigns them if we stay away
+            print(f"Coordinator heartbeat failed: {e}")
+        time.sleep(Config.HEARTBEAT_INTERVAL)
+
+# Initialize cameras (each connects in its own capture thread). As a shard
+# worker, the coordinator decides which cameras this process owns.
+if Config.COORDINATOR_URL:
+    threading.Thread(target=run_worker_heartbeat, daemon=True).start()
+else:
+    for name, url in Config.CAMERA_URLS.items():
+        camera_manager.add_camera(name, url)
 
 def generate_frames(camera_name):
     """Generate video frames with YOLO detection"""
-    while True:
+    while camera_name in camera_manager.cameras:
         try:
             frame = camera_manager.get_frame(camera_name)
             if frame is not None:
-                # Apply YOLO detection
-                annotated_frame, detections, confidences = yolo_detector.detect_objects(frame)
+                # Apply YOLO detection (raw frames are streamed until the model is warm)
+                if yolo_detector is not None:
+                    annotated_frame, detections, confidences = yolo_detector.detect_objects(frame)
+                else:
+                    annotated_frame, detections, confidences = frame, [], []
                 
                 # Log detections if any objects found
                 if detections:
-                    db_manager.log_detection(camera_name, detections, confidences)
+                    row_id = db_manager.log_detection(camera_name, detections, confidences)
+                    event_bus.publish('detection', {
+                        'id': row_id,
+                        'camera': camera_name,
+                        'objects': detections,
+                        'confidences': confidences,
+                        'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+                    })
                 
                 # Encode frame as JPEG
                 ret, buffer = cv2.imencode('.jpg', annotated_frame, 
@@ -40,16 +113,13 @@ def generate_frames(camera_name):
                     frame_bytes = buffer.tobytes()
                     yield (b'--frame\r\n'
                            b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            else:
-                # Send a black frame if no camera feed
-                black_frame = cv2.zeros((480, 640, 3), dtype=cv2.uint8)
-                cv2.putText(black_frame, f'Camera {camera_name} Offline', 
-                           (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                ret, buffer = cv2.imencode('.jpg', black_frame)
-                if ret:
-                    frame_bytes = buffer.tobytes()
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            elif not camera_manager.get_camera_status(camera_name):
+                # Send the pre-encoded offline frame, once a second is plenty
+                frame_bytes, _ = snapshot_cache.placeholder(camera_name)
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                time.sleep(1)
+                continue
             
             time.sleep(0.033)  # ~30 FPS
             
@@ -60,37 +130,92 @@ def generate_frames(camera_name):
 @app.route('/video_feed/<camera_name>')
 def video_feed(camera_name):
     """Video streaming route"""
-    if camera_name in Config.CAMERA_URLS:
+    if camera_name in camera_manager.cameras:
         return Response(generate_frames(camera_name),
                        mimetype='multipart/x-mixed-replace; boundary=frame')
     else:
         return jsonify({'error': 'Camera not found'}), 404
 
+def image_response(camera_name, width):
+    """Serve a cached still, answering 304 when the client's ETag is current"""
+    if camera_name not in camera_manager.cameras:
+        return jsonify({'error': 'Camera not found'}), 404
+    
+    jpeg_bytes, etag = snapshot_cache.get(camera_name, width)
+    # if_none_match holds unquoted tags, so compare and set the bare digest
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(jpeg_bytes, mimetype='image/jpeg')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/snapshot/<camera_name>')
+def snapshot(camera_name):
+    """Latest frame as a single JPEG (optionally ?width= one of SNAPSHOT_WIDTHS)"""
+    width = request.args.get('width', type=int)
+    if width is not None and width not in Config.SNAPSHOT_WIDTHS:
+        return jsonify({'error': f'width must be one of {list(Config.SNAPSHOT_WIDTHS)}'}), 400
+    return image_response(camera_name, width)
+
+@app.route('/thumbnail/<camera_name>')
+def thumbnail(camera_name):
+    """Latest frame downscaled to THUMBNAIL_WIDTH"""
+    return image_response(camera_name, Config.THUMBNAIL_WIDTH)
+
 @app.route('/camera_status')
 def camera_status():
     """Get status of all cameras"""
     status = {}
-    for camera_name in Config.CAMERA_URLS.keys():
+    for camera_name in list(camera_manager.cameras):
         status[camera_name] = camera_manager.get_camera_status(camera_name)
     return jsonify(status)
 
 @app.route('/detection_history/<camera_name>')
 def detection_history(camera_name):
     """Get detection history for a camera"""
-    history = db_manager.get_detection_history(camera_name, limit=50)
+    since_id = request.args.get('since_id', 0, type=int)
+    history = db_manager.get_detection_history(camera_name, limit=50, since_id=since_id)
     return jsonify(history)
 
 @app.route('/all_detection_history')
 def all_detection_history():
     """Get detection history for all cameras"""
-    history = db_manager.get_detection_history(limit=100)
+    since_id = request.args.get('since_id', 0, type=int)
+    history = db_manager.get_detection_history(limit=100, since_id=since_id)
     return jsonify(history)
 
+@app.route('/events')
+def events():
+    """Server-sent event stream of camera status changes and new detections"""
+    return event_bus.sse_response(
+        lambda: {name: camera_manager.get_camera_status(name) for name in list(camera_manager.cameras)})
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'timestamp': time.time()})
 
+@app.route('/ready')
+def ready():
+    """Readiness check reporting the startup state of each component"""
+    cameras = {}
+    for camera_name in list(camera_manager.cameras):
+        online = camera_manager.camera_online.get(camera_name)
+        cameras[camera_name] = 'connecting' if online is None else ('online' if online else 'offline')
+    
+    # Cameras may legitimately stay offline, so only the model gates readiness
+    is_ready = model_state == 'ready'
+    return jsonify({
+        'ready': is_ready,
+        'components': {
+            'database': 'ready',
+            'model': model_state,
+            'cameras': cameras
+        }
+    }), 200 if is_ready else 503
+
 if __name__ == '__main__':
     try:
         print(f"Starting Flask backend on {Config.FLASK_HOST}:{Config.FLASK_PORT}")
@@ -0,0 +1,278 @@
+"""Load generator for the MJPEG streaming and status endpoints.
+
+Opens many concurrent /video_feed streams (and optional /camera_status
+pollers) against a running backend, parses the multipart frame boundaries
+and reports per-client delivered fps, inter-frame jitter and
+time-to-first-frame. Client counts can be swept to find the point where
+frame delivery degrades.
+
+With --spawn-backend a private flask_backend.py is started on its own port
+and database, fed by the benchmark video sources, so no real cameras or
+network are needed:
+
+    python loadtest.py --spawn-backend --clients 1,10,50 --slow-readers 5
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+import requests
+
+from app import wait_for_backend
+from bench_utils import make_synthetic_video, parse_resolution, percentile
+from config import Config
+
+BOUNDARY = b'--frame'
+HEADER_END = b'\r\n\r\n'
+
+
+def iter_mjpeg_frames(chunks):
+    """Yield JPEG payloads from a multipart/x-mixed-replace byte stream"""
+    buffer = b''
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            start = buffer.find(BOUNDARY)
+            if start < 0:
+                break
+            header_end = buffer.find(HEADER_END, start)
+            if header_end < 0:
+                break
+            body_start = header_end + len(HEADER_END)
+            next_boundary = buffer.find(BOUNDARY, body_start)
+            if next_boundary < 0:
+                break
+            # Part body ends with the CRLF that precedes the next boundary
+            yield buffer[body_start:next_boundary].rstrip(b'\r\n')
+            buffer = buffer[next_boundary:]
+
+
+class StreamClient(threading.Thread):
+    """One MJPEG viewer; slow readers sleep between small socket reads"""
+
+    def __init__(self, url, duration, read_size=65536, read_delay=0.0):
+        super().__init__(daemon=True)
+        self.url = url
+        self.duration = duration
+        self.read_size = read_size
+        self.read_delay = read_delay
+        self.frame_times = []
+        self.bad_frames = 0
+        self.time_to_first_frame = None
+        self.error = None
+
+    def _chunks(self, response, deadline):
+        while time.perf_counter() < deadline:
+            # read1 returns whatever has arrived instead of waiting for a full buffer
+            chunk = response.read1(self.read_size)
+            if not chunk:
+                return
+            yield chunk
+            if self.read_delay:
+                time.sleep(self.read_delay)
+
+    def run(self):
+        start = time.perf_counter()
+        deadline = start + self.duration
+        parts = urlsplit(self.url)
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+        try:
+            connection.request('GET', parts.path)
+            response = connection.getresponse()
+            if response.status != 200:
+                raise Exception(f"HTTP {response.status}")
+            for frame in iter_mjpeg_frames(self._chunks(response, deadline)):
+                now = time.perf_counter()
+                if not frame.startswith(b'\xff\xd8'):
+                    self.bad_frames += 1
+                    continue
+                if self.time_to_first_frame is None:
+                    self.time_to_first_frame = now - start
+                self.frame_times.append(now)
+                if now >= deadline:
+                    break
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            connection.close()
+
+    def metrics(self):
+        intervals = [b - a for a, b in zip(self.frame_times, self.frame_times[1:])]
+        span = self.frame_times[-1] - self.frame_times[0] if len(self.frame_times) > 1 else 0
+        return {
+            'url': self.url,
+            'slow_reader': bool(self.read_delay),
+            'frames': len(self.frame_times),
+            'bad_frames': self.bad_frames,
+            'fps': round((len(self.frame_times) - 1) / span, 2) if span else 0.0,
+            'ttff_ms': round(self.time_to_first_frame * 1000, 1) if self.time_to_first_frame is not None else None,
+            'jitter_ms': round(statistics.pstdev(intervals) * 1000, 2) if len(intervals) > 1 else None,
+            'gap_p99_ms': round(percentile(intervals, 99) * 1000, 2) if intervals else None,
+            'error': self.error,
+        }
+
+
+class StatusPoller(threading.Thread):
+    """Polls /camera_status back-to-back and records request latency"""
+
+    def __init__(self, url, duration, interval=0.0):
+        super().__init__(daemon=True)
+        self.url = url
+        self.duration = duration
+        self.interval = interval
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        session = requests.Session()
+        deadline = time.perf_counter() + self.duration
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                session.get(self.url, timeout=5).raise_for_status()
+                self.latencies.append(time.perf_counter() - started)
+            except Exception:
+                self.errors += 1
+            if self.interval:
+                time.sleep(self.interval)
+
+
+def run_level(base_url, cameras, clients, slow_readers, status_clients, args):
+    """Run one concurrency level and return aggregated metrics"""
+    streams = []
+    for i in range(clients):
+        camera = cameras[i % len(cameras)]
+        slow = i < slow_readers
+        streams.append(StreamClient(
+            f"{base_url}/video_feed/{quote(camera)}", args.duration,
+            read_size=args.slow_read_size if slow else 65536,
+            read_delay=args.slow_read_delay if slow else 0.0))
+    pollers = [StatusPoller(f"{base_url}/camera_status", args.duration, args.status_interval)
+               for _ in range(status_clients)]
+
+    for worker in streams + pollers:
+        worker.start()
+    for worker in streams + pollers:
+        worker.join(args.duration + 15)
+
+    per_client = [s.metrics() for s in streams]
+    normal = [m for m in per_client if not m['slow_reader'] and not m['error']]
+    fps_values = [m['fps'] for m in normal]
+    ttffs = [m['ttff_ms'] for m in normal if m['ttff_ms'] is not None]
+    jitters = [m['jitter_ms'] for m in normal if m['jitter_ms'] is not None]
+    status_latencies = [lat for p in pollers for lat in p.latencies]
+
+    return {
+        'clients': clients,
+        'slow_readers': min(slow_readers, clients),
+        'status_clients': status_clients,
+        'errors': sum(1 for m in per_client if m['error']),
+        'fps_median': round(statistics.median(fps_values), 2) if fps_values else 0.0,
+        'fps_min': round(min(fps_values), 2) if fps_values else 0.0,
+        'total_fps': round(sum(fps_values), 2),
+        'ttff_p50_ms': percentile(ttffs, 50),
+        'ttff_p99_ms': percentile(ttffs, 99),
+        'jitter_p50_ms': percentile(jitters, 50),
+        'jitter_p99_ms': percentile(jitters, 99),
+        'status_requests': len(status_latencies),
+        'status_p50_ms': round(percentile(status_latencies, 50) * 1000, 2) if status_latencies else None,
+        'status_p99_ms': round(percentile(status_latencies, 99) * 1000, 2) if status_latencies else None,
+        'status_errors': sum(p.errors for p in pollers),
+        'per_client': per_client,
+    }
+
+
+def spawn_backend(args):
+    """Start a private backend whose cameras replay benchmark video sources"""
+    workdir = tempfile.mkdtemp(prefix='loadtest_')
+    sources = args.videos or [make_synthetic_video(
+        os.path.join(workdir, 'synthetic.avi'), *parse_resolution(args.resolution))]
+    cameras = {f'Load {i + 1}': sources[i % len(sources)] for i in range(args.cameras)}
+    env = dict(os.environ,
+               CAMERA_URLS=json.dumps(cameras),
+               FLASK_HOST='127.0.0.1',
+               FLASK_PORT=str(args.port),
+               DATABASE_PATH=os.path.join(workdir, 'loadtest.db'),
+               ARCHIVE_PATH=os.path.join(workdir, 'archive'))
+    # A standalone backend: don't register with a coordinator from the caller's env
+    env.pop('COORDINATOR_URL', None)
+    process = subprocess.Popen([sys.executable, 'flask_backend.py'], env=env,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    return process, f"http://127.0.0.1:{args.port}", list(cameras)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MJPEG streaming load test')
+    parser.add_argument('--url', default=f"http://{Config.FLASK_HOST}:{Config.FLASK_PORT}",
+                        help='Backend base URL (ignored with --spawn-backend)')
+    parser.add_argument('--spawn-backend', action='store_true',
+                        help='Start a private backend fed by video files / synthetic clips')
+    parser.add_argument('--videos', nargs='*', default=[], help='Video files for --spawn-backend')
+    parser.add_argument('--cameras', type=int, default=2, help='Virtual cameras for --spawn-backend')
+    parser.add_argument('--resolution', default='640x480', help='Synthetic clip size for --spawn-backend')
+    parser.add_argument('--port', type=int, default=5099, help='Port for --spawn-backend')
+    parser.add_argument('--clients', default='1,5,10,25', help='Comma-separated concurrent stream counts')
+    parser.add_argument('--slow-readers', type=int, default=0, help='Stream clients per level that read slowly')
+    parser.add_argument('--slow-read-size', type=int, default=4096, help='Bytes per read for slow readers')
+    parser.add_argument('--slow-read-delay', type=float, default=0.1, help='Seconds between slow reads')
+    parser.add_argument('--status-clients', type=int, default=0, help='Concurrent /camera_status pollers')
+    parser.add_argument('--status-interval', type=float, default=0.0, help='Delay between status polls')
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds per concurrency level')
+    parser.add_argument('--degraded-fraction', type=float, default=0.8,
+                        help='Median fps below this fraction of the 1st level counts as degraded')
+    parser.add_argument('--output', default='loadtest_results.json', help='Where to write the JSON results')
+    args = parser.parse_args()
+
+    process = None
+    try:
+        if args.spawn_backend:
+            process, base_url, cameras = spawn_backend(args)
+        else:
+            base_url = args.url.rstrip('/')
+            cameras = None
+
+        # Returns early if the spawned backend exits or its model fails to load
+        if not wait_for_backend(process, base_url=base_url):
+            if process and process.poll() is not None:
+                print(f"❌ Spawned backend exited with code {process.returncode}")
+            else:
+                print(f"❌ Backend at {base_url} did not become ready")
+            sys.exit(1)
+        if cameras is None:
+            cameras = list(requests.get(f"{base_url}/camera_status", timeout=5).json())
+
+        levels = []
+        reference_fps = None
+        for clients in [int(c) for c in args.clients.split(',')]:
+            print(f"Running {clients} stream client(s) for {args.duration}s...")
+            level = run_level(base_url, cameras, clients, args.slow_readers, args.status_clients, args)
+            if reference_fps is None:
+                reference_fps = level['fps_median']
+            level['degraded'] = bool(reference_fps) and level['fps_median'] < args.degraded_fraction * reference_fps
+            print(f"  median {level['fps_median']} fps (min {level['fps_min']}), "
+                  f"TTFF p99 {level['ttff_p99_ms']} ms, jitter p99 {level['jitter_p99_ms']} ms, "
+                  f"errors {level['errors']}{'  ⚠️ degraded' if level['degraded'] else ''}")
+            levels.append(level)
+
+        with open(args.output, 'w') as f:
+            json.dump({'url': base_url, 'cameras': cameras, 'levels': levels}, f, indent=2)
+        print(f"Results written to {args.output}")
+    finally:
+        if process:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == '__main__':
+    main()
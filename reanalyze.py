@@ -0,0 +1,288 @@
+"""Bulk offline re-analysis of recorded or archived video.
+
+Runs YOLODetector over video files faster than real time: files are
+decoded in parallel worker processes, every --stride'th frame is analysed
+in batches, and detections are written through DatabaseManager in bulk
+with the frame's original timestamp. Progress is checkpointed per file
+(and per model and stride), so an interrupted run resumes where it stopped.
+
+Examples:
+    python reanalyze.py                        # everything in RECORDING_PATH
+    python reanalyze.py lobby.mp4 archive/ --stride 5 --batch-size 16 --workers 8
+    python reanalyze.py --model yolov8s.pt --camera "Camera 1" cam1_20240101_080000.mp4
+
+Without --camera, each file's camera name is its file name minus the
+extension and any recording timestamp (lobby_20240101_080000.mp4 -> lobby).
+
+Timestamps: a YYYYmmdd_HHMMSS (or YYYYmmdd-HHMMSS) stamp in the file name is
+taken as the local start time of the recording; otherwise the start is the
+file's modification time minus the video duration. Rows flushed just
+before a crash may be written again on resume.
+
+Replacement: when a file finishes, every detection that existed for its
+camera and time span before the pass started (live detections and earlier
+passes, in the database and the archive) is deleted, so re-running with a
+new model replaces the span instead of counting it twice.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import cv2
+
+from config import Config
+from database import DatabaseManager
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.m4v', '.webm', '.mpg', '.mpeg', '.ts')
+FILENAME_TIMESTAMP = re.compile(r'(\d{8})[_-](\d{6})')
+
+# Per-process state set up by init_worker
+detector = None
+db_manager = None
+
+
+def find_videos(paths):
+    """Expand files and directories into a sorted list of video files"""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                videos.extend(os.path.join(root, name) for name in files
+                              if name.lower().endswith(VIDEO_EXTENSIONS))
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            print(f"Skipping {path}: not found")
+    return sorted(set(videos))
+
+
+def recording_start(path, frame_count, fps):
+    """UTC start time of a recording (see module docstring)"""
+    match = FILENAME_TIMESTAMP.search(os.path.basename(path))
+    if match:
+        local_start = datetime.strptime(''.join(match.groups()), '%Y%m%d%H%M%S')
+        return datetime.utcfromtimestamp(local_start.timestamp())
+    duration = frame_count / fps if fps else 0
+    return datetime.utcfromtimestamp(os.path.getmtime(path) - duration)
+
+
+def camera_name_for(path):
+    """Default camera name: the file name without extension or recording timestamp"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return FILENAME_TIMESTAMP.sub('', stem).strip('_- ') or stem
+
+
+def seek(cap, video_path, frame_index):
+    """Position cap at frame_index, returning the capture to read from.
+
+    CAP_PROP_POS_FRAMES lands on a keyframe with some codecs, so the position
+    is checked and an inexact seek falls back to grabbing forward from the start.
+    """
+    if cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index) and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_index:
+        return cap
+    cap.release()
+    cap = cv2.VideoCapture(video_path)
+    for _ in range(frame_index):
+        if not cap.grab():
+            break
+    return cap
+
+
+class Checkpoint:
+    """Resume state for one (video file, model, stride), stored as a small JSON file"""
+
+    def __init__(self, checkpoint_dir, video_path, model_path, stride=1):
+        self.video_path = os.path.abspath(video_path)
+        key = hashlib.md5(f"{self.video_path}|{model_path}|{stride}".encode('utf-8')).hexdigest()
+        self.path = os.path.join(checkpoint_dir, f"{key}.json")
+        self.state = {'video': self.video_path, 'model': model_path, 'stride': stride,
+                      'size': os.path.getsize(video_path), 'next_frame': 0, 'done': False}
+
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                saved = json.load(f)
+            # A file that changed since the checkpoint is analysed from scratch
+            if saved.get('size') == self.state['size']:
+                self.state = saved
+
+    def save(self, next_frame, done=False):
+        """Atomically record the first frame not yet written to the database"""
+        self.state.update(next_frame=next_frame, done=done)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+
+def init_worker(model_path, db_path, archive_path, threads_per_worker):
+    """Load the model once per worker process"""
+    global detector, db_manager
+    cv2.setNumThreads(1)
+    import torch
+    torch.set_num_threads(threads_per_worker)
+
+    from yolo_detector import YOLODetector
+    detector = YOLODetector(model_path=model_path)
+    db_manager = DatabaseManager(db_path, archive_path=archive_path)
+
+
+def analyse_file(video_path, camera_name, model_path, stride, batch_size, flush_every, checkpoint_dir):
+    """Analyse one video file; returns a summary dict"""
+    checkpoint = Checkpoint(checkpoint_dir, video_path, model_path, stride)
+    summary = {'video': video_path, 'camera': camera_name, 'frames_analysed': 0,
+               'detections': 0, 'replaced': 0, 'video_seconds': 0.0, 'wall_seconds': 0.0, 'skipped': False}
+    if checkpoint.state['done']:
+        summary['skipped'] = True
+        return summary
+
+    started = time.perf_counter()
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise Exception(f"Cannot open {video_path}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    start_time = recording_start(video_path, frame_count, fps)
+
+    resume_frame = frame_index = last_flush = checkpoint.state['next_frame']
+    if resume_frame:
+        cap = seek(cap, video_path, resume_frame)
+    else:
+        # Rows up to this id predate the pass and are replaced when it completes
+        replaces_up_to_id = db_manager.last_detection_id()
+        if replaces_up_to_id is None:
+            raise Exception(f"Database read failed for {video_path}")
+        checkpoint.state['replaces_up_to_id'] = replaces_up_to_id
+        checkpoint.save(0)
+
+    batch = []  # (frame_index, frame)
+    pending_rows = []
+
+    def run_batch():
+        # A failed inference raises, so the file is reported as failed and not checkpointed
+        for (index, _), (_, detections, confidences) in zip(batch, detector.detect_objects_batch(
+                [frame for _, frame in batch], draw=False, raise_errors=True)):
+            if detections:
+                timestamp = start_time + timedelta(seconds=index / fps)
+                pending_rows.append((camera_name, detections, confidences,
+                                     timestamp.strftime('%Y-%m-%d %H:%M:%S')))
+        summary['frames_analysed'] += len(batch)
+        batch.clear()
+
+    def flush(next_frame, done=False):
+        if pending_rows and not db_manager.log_detections_bulk(pending_rows):
+            raise Exception(f"Database write failed for {video_path}")
+        summary['detections'] += len(pending_rows)
+        pending_rows.clear()
+        # Checkpoints from before replacement was added have no baseline; keep their rows
+        if done and checkpoint.state.get('replaces_up_to_id') is not None:
+            span_end = start_time + timedelta(seconds=next_frame / fps)
+            replaced = db_manager.delete_detections(
+                camera_name, start_time.strftime('%Y-%m-%d %H:%M:%S'),
+                span_end.strftime('%Y-%m-%d %H:%M:%S'), checkpoint.state['replaces_up_to_id'])
+            if replaced is None:
+                raise Exception(f"Replacing earlier detections failed for {video_path}")
+            summary['replaced'] = replaced
+        checkpoint.save(next_frame, done)
+
+    try:
+        while True:
+            # grab() skips decoding for frames the stride drops
+            if not cap.grab():
+                break
+            if frame_index % stride == 0:
+                ret, frame = cap.retrieve()
+                if ret:
+                    batch.append((frame_index, frame))
+            frame_index += 1
+
+            if len(batch) >= batch_size:
+                run_batch()
+            # Only checkpoint when every frame before frame_index has been analysed
+            if frame_index - last_flush >= flush_every and not batch:
+                flush(frame_index)
+                last_flush = frame_index
+
+        if batch:
+            run_batch()
+        flush(frame_index, done=True)
+    finally:
+        cap.release()
+
+    summary['video_seconds'] = (frame_index - resume_frame) / fps
+    summary['wall_seconds'] = time.perf_counter() - started
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-run YOLO detection over recorded video')
+    parser.add_argument('paths', nargs='*', default=[Config.RECORDING_PATH],
+                        help='Video files or directories (default: RECORDING_PATH)')
+    parser.add_argument('--camera', help='Camera name for all files (default: file name without '
+                                         'extension or timestamp)')
+    parser.add_argument('--model', default=Config.YOLO_MODEL_PATH, help='Model to analyse with')
+    parser.add_argument('--stride', type=int, default=1, help='Analyse every Nth frame')
+    parser.add_argument('--batch-size', type=int, default=8, help='Frames per inference call')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help='Parallel worker processes')
+    parser.add_argument('--flush-every', type=int, default=3000,
+                        help='Frames between database writes / checkpoints')
+    parser.add_argument('--checkpoint-dir', default=Config.REANALYSIS_CHECKPOINT_PATH)
+    parser.add_argument('--database', default=Config.DATABASE_PATH)
+    parser.add_argument('--archive', default=Config.ARCHIVE_PATH,
+                        help='Detection archive to replace earlier detections in')
+    args = parser.parse_args()
+
+    videos = find_videos(args.paths)
+    if not videos:
+        print("No video files found")
+        return
+    os.makedirs(args.checkpoint_dir, exist_ok=True)
+    # Create tables (and the default admin) once, before the workers start
+    DatabaseManager(args.database, archive_path=args.archive)
+
+    workers = min(args.workers, len(videos))
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🎞️ Re-analysing {len(videos)} file(s) with {args.model} on {workers} worker(s), "
+          f"stride {args.stride}, batch {args.batch_size}")
+
+    started = time.perf_counter()
+    totals = {'files': 0, 'detections': 0, 'video_seconds': 0.0}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(args.model, args.database, args.archive, threads_per_worker)) as pool:
+        futures = {
+            pool.submit(analyse_file, video,
+                        args.camera or camera_name_for(video),
+                        args.model, args.stride, args.batch_size, args.flush_every,
+                        args.checkpoint_dir): video
+            for video in videos
+        }
+        for future in as_completed(futures):
+            video = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"❌ {video}: {e}")
+                continue
+            if summary['skipped']:
+                print(f"⏭️ {video}: already analysed")
+                continue
+            speed = summary['video_seconds'] / summary['wall_seconds'] if summary['wall_seconds'] else 0
+            print(f"✅ {video}: {summary['frames_analysed']} frames, {summary['detections']} detections "
+                  f"(replacing {summary['replaced']}), {speed:.1f}x real time")
+            totals['files'] += 1
+            totals['detections'] += summary['detections']
+            totals['video_seconds'] += summary['video_seconds']
+
+    wall = time.perf_counter() - started
+    print(f"Done: {totals['files']} file(s), {totals['detections']} detections, "
+          f"{totals['video_seconds'] / 60:.1f} min of video in {wall / 60:.1f} min")
+
+
+if __name__ == '__main__':
+    main()
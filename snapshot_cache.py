@@ -0,0 +1,65 @@
+import hashlib
+import threading
+import cv2
+import numpy as np
+from config import Config
+
+class SnapshotCache:
+    """Per-camera cache of JPEG-encoded stills for the snapshot/thumbnail API.
+
+    A camera's latest frame is encoded at most once per (frame, width) no
+    matter how many clients poll, and offline placeholders are encoded once
+    per (camera, width) for the life of the process.
+    """
+    
+    def __init__(self, camera_manager, quality=Config.SNAPSHOT_JPEG_QUALITY):
+        self.camera_manager = camera_manager
+        self.quality = quality
+        self.entries = {}  # (camera_name, width) -> (frame_seq, jpeg_bytes, etag)
+        self.placeholders = {}  # (camera_name, width) -> (jpeg_bytes, etag)
+        self.lock = threading.Lock()
+    
+    def get(self, camera_name, width=None):
+        """Return (jpeg_bytes, etag) for the camera's latest frame or its offline placeholder"""
+        seq, frame = self.camera_manager.get_latest_frame(camera_name)
+        if frame is None or not self.camera_manager.get_camera_status(camera_name):
+            return self.placeholder(camera_name, width)
+        
+        key = (camera_name, width)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry and entry[0] == seq:
+            return entry[1], entry[2]
+        
+        jpeg_bytes, etag = self._encode(frame, width)
+        with self.lock:
+            self.entries[key] = (seq, jpeg_bytes, etag)
+        return jpeg_bytes, etag
+    
+    def placeholder(self, camera_name, width=None):
+        """Return the pre-encoded 'Camera Offline' frame for a camera"""
+        key = (camera_name, width)
+        with self.lock:
+            cached = self.placeholders.get(key)
+        if cached:
+            return cached
+        
+        black_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        cv2.putText(black_frame, f'Camera {camera_name} Offline', 
+                   (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        cached = self._encode(black_frame, width)
+        with self.lock:
+            self.placeholders[key] = cached
+        return cached
+    
+    def _encode(self, frame, width):
+        """Resize (keeping aspect ratio) and JPEG-encode a frame"""
+        if width and width != frame.shape[1]:
+            height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ret:
+            raise ValueError("JPEG encoding failed")
+        jpeg_bytes = buffer.tobytes()
+        # Unquoted; the response adds the quotes via set_etag()
+        return jpeg_bytes, hashlib.md5(jpeg_bytes).hexdigest()
@@ -1,6 +1,7 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import requests
-import time
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -17,8 +18,19 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize database
-db_manager = DatabaseManager(Config.DATABASE_PATH)
+API_URL = f"http://{Config.FLASK_HOST}:{Config.FLASK_PORT}"
+
+@st.cache_resource
+def get_db_manager():
+    """Database manager shared by every rerun and session of this server"""
+    return DatabaseManager(Config.DATABASE_PATH)
+
+@st.cache_resource
+def get_http_session():
+    """Pooled keep-alive HTTP session for backend API calls"""
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+    return session
 
 # Custom CSS
 st.markdown("""
@@ -48,22 +60,144 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Live panel rendered in a component iframe; it re-renders only itself when
+# backend events arrive. All panels on a page share one /events connection,
+# kept on the parent (dashboard) window, so each dashboard tab holds a single
+# event stream next to its video feed instead of one per panel.
+LIVE_PANEL_HTML = """
+<style>
+    body { font-family: "Source Sans Pro", sans-serif; margin: 0; font-size: 0.95rem; }
+    .online { color: #28a745; font-weight: bold; }
+    .offline { color: #dc3545; font-weight: bold; }
+    .detection { border-bottom: 1px solid #eee; padding: 4px 0; }
+    .time { color: #888; font-size: 0.8rem; }
+    .banner { padding: 12px 16px; border-radius: 8px; }
+    .banner.online { background: #d4edda; }
+    .banner.offline { background: #f8d7da; }
+    .alert { background: #fff3cd; border-radius: 8px; padding: 10px 14px; margin-bottom: 6px; }
+</style>
+<div id="panel"></div>
+<script>
+    const config = __CONFIG__;
+    const status = config.status;
+    let detections = config.detections;
+    const root = document.getElementById("panel");
+
+    function escapeHtml(text) {
+        const div = document.createElement("div");
+        div.textContent = String(text);
+        return div.innerHTML;
+    }
+
+    function render() {
+        if (config.panel === "status") {
+            root.innerHTML = config.cameras.map(name => status[name]
+                ? `<div class="online">${escapeHtml(name)}: 🟢 Online</div>`
+                : `<div class="offline">${escapeHtml(name)}: 🔴 Offline</div>`).join("");
+        } else if (config.panel === "banner") {
+            root.innerHTML = status[config.camera]
+                ? `<div class="banner online">✅ ${escapeHtml(config.camera)} is online and streaming</div>`
+                : `<div class="banner offline">❌ ${escapeHtml(config.camera)} is offline</div>`;
+        } else if (config.panel === "alerts") {
+            const alerts = detections.flatMap(d => d.objects
+                .map((obj, i) => ({obj, conf: d.confidences[i], camera: d.camera, timestamp: d.timestamp}))
+                .filter(a => config.alertObjects.includes(a.obj) && a.conf >= config.alertThreshold));
+            root.innerHTML = alerts.length
+                ? alerts.map(a => `<div class="alert">🚨 <b>ALERT</b>: ${escapeHtml(a.obj)} detected with
+                    ${a.conf.toFixed(2)} confidence at ${escapeHtml(a.timestamp)} on ${escapeHtml(a.camera)}</div>`).join("")
+                : "<i>No recent alerts based on current settings</i>";
+        } else if (detections.length) {
+            root.innerHTML = detections.map(d => `<div class="detection">
+                <div class="time">🔍 Detection at ${escapeHtml(d.timestamp)}</div>
+                ${d.objects.map((obj, i) => `<b>${escapeHtml(obj)}</b>: ${d.confidences[i].toFixed(2)}`).join("<br>")}
+            </div>`).join("");
+        } else {
+            root.innerHTML = "<i>No recent detections</i>";
+        }
+    }
+
+    function eventHub() {
+        let host = window;
+        try {
+            window.parent.document;  // throws if the iframe is cross-origin
+            host = window.parent;
+        } catch (err) {}
+
+        let hub = host.__surveillanceEvents;
+        if (hub && hub.url !== config.eventsUrl) {
+            hub.source.close();
+            hub = null;
+        }
+        if (!hub) {
+            // Created in the host window so it outlives the panel iframes of one rerun
+            const source = new host.EventSource(config.eventsUrl);
+            hub = {url: config.eventsUrl, source, status: {}, listeners: new Set(), closeTimer: null};
+            ["snapshot", "camera_status", "detection"].forEach(type => source.addEventListener(type, e => {
+                const data = JSON.parse(e.data);
+                if (type === "snapshot") Object.assign(hub.status, data.status);
+                if (type === "camera_status") hub.status[data.camera] = data.online;
+                hub.listeners.forEach(listener => {
+                    try {
+                        listener(type, data);
+                    } catch (err) {
+                        hub.listeners.delete(listener);  // panel removed without pagehide
+                    }
+                });
+            }));
+            host.__surveillanceEvents = hub;
+        }
+        clearTimeout(hub.closeTimer);
+        return [host, hub];
+    }
+
+    const statusPanel = config.panel === "status" || config.panel === "banner";
+    function onEvent(type, data) {
+        if (type === "snapshot") {
+            Object.assign(status, data.status);
+        } else if (type === "camera_status") {
+            status[data.camera] = data.online;
+        } else if (statusPanel || (config.camera && data.camera !== config.camera)) {
+            return;
+        } else {
+            detections = [data, ...detections].slice(0, config.limit);
+        }
+        if (statusPanel || type === "detection") render();
+    }
+
+    const [host, hub] = eventHub();
+    Object.assign(status, hub.status);
+    hub.listeners.add(onEvent);
+    window.addEventListener("pagehide", () => {
+        hub.listeners.delete(onEvent);
+        // Live Updates off (or the page left): drop the stream once no panel is left
+        hub.closeTimer = host.setTimeout(() => {
+            if (!hub.listeners.size && host.__surveillanceEvents === hub) {
+                hub.source.close();
+                delete host.__surveillanceEvents;
+            }
+        }, 5000);
+    });
+    render();
+</script>
+"""
+
 def check_flask_backend():
     """Check if Flask backend is running"""
     try:
-        response = requests.get(f"http://{Config.FLASK_HOST}:{Config.FLASK_PORT}/health", timeout=5)
+        response = get_http_session().get(f"{API_URL}/health", timeout=5)
         return response.status_code == 200
     except:
         return False
 
 def authenticate_user(username, password):
     """Authenticate user"""
-    return db_manager.verify_user(username, password)
+    return get_db_manager().verify_user(username, password)
 
+@st.cache_data(ttl=Config.STATUS_CACHE_TTL)
 def get_camera_status():
     """Get camera status from Flask backend"""
     try:
-        response = requests.get(f"http://{Config.FLASK_HOST}:{Config.FLASK_PORT}/camera_status", timeout=5)
+        response = get_http_session().get(f"{API_URL}/camera_status", timeout=5)
         if response.status_code == 200:
             return response.json()
     except:
@@ -71,19 +205,76 @@ def get_camera_status():
     return {}
 
 def get_detection_history(camera_name=None):
-    """Get detection history"""
+    """Get detection history, fetching only rows newer than this session's cursor"""
+    if camera_name:
+        url = f"{API_URL}/detection_history/{camera_name}"
+        limit = 50
+    else:
+        url = f"{API_URL}/all_detection_history"
+        limit = 100
+    
+    history = st.session_state.setdefault(f"history::{camera_name or '*'}", {'cursor': 0, 'rows': []})
     try:
-        if camera_name:
-            url = f"http://{Config.FLASK_HOST}:{Config.FLASK_PORT}/detection_history/{camera_name}"
-        else:
-            url = f"http://{Config.FLASK_HOST}:{Config.FLASK_PORT}/all_detection_history"
-        
-        response = requests.get(url, timeout=5)
+        response = get_http_session().get(url, params={'since_id': history['cursor']}, timeout=5)
         if response.status_code == 200:
-            return response.json()
+            new_rows = response.json()
+            if new_rows:
+                history['rows'] = (new_rows + history['rows'])[:limit]
+                history['cursor'] = max(row[0] for row in new_rows)
     except:
         pass
-    return []
+    return history['rows']
+
+@st.cache_data(ttl=Config.DATAFRAME_CACHE_TTL)
+def build_detection_frames(row_ids, _detections):
+    """Parse detection rows into per-object and per-detection DataFrames.
+
+    Cached by the ids of the rows, so sessions showing the same window share
+    the result and rows are only re-parsed when the window changes.
+    """
+    object_rows = []
+    count_rows = []
+    for detection in _detections:
+        objects = json.loads(detection[2])
+        camera = detection[1]
+        timestamp = datetime.strptime(detection[4], '%Y-%m-%d %H:%M:%S')
+        
+        for obj in objects:
+            object_rows.append({
+                'Object': obj,
+                'Camera': camera,
+                'Timestamp': timestamp
+            })
+        count_rows.append({
+            'Count': len(objects),
+            'Timestamp': timestamp,
+            'Camera': camera,
+            'Hour': timestamp.hour
+        })
+    return pd.DataFrame(object_rows), pd.DataFrame(count_rows)
+
+def render_live_panel(panel, camera_names, camera_status, camera=None, detections=(), limit=5, height=200,
+                      alert_objects=(), alert_threshold=1.0):
+    """Render a panel that updates itself from the backend event stream"""
+    config = {
+        'panel': panel,
+        'eventsUrl': f"{API_URL}/events",
+        'cameras': camera_names,
+        'status': camera_status,
+        'camera': camera,
+        'limit': limit,
+        'detections': [{
+            'camera': detection[1],
+            'objects': json.loads(detection[2]),
+            'confidences': json.loads(detection[3]),
+            'timestamp': detection[4]
+        } for detection in detections[:limit]],
+        'alertObjects': list(alert_objects),
+        'alertThreshold': alert_threshold
+    }
+    # '</' inside the inline script would let a camera name close the <script> tag
+    config_json = json.dumps(config).replace('</', '<\\/')
+    components.html(LIVE_PANEL_HTML.replace('__CONFIG__', config_json), height=height, scrolling=True)
 
 def main():
     # Initialize session state
@@ -144,17 +335,22 @@ def main():
         # Camera status
         st.markdown("### 📊 Camera Status")
         camera_status = get_camera_status()
-        
-        for camera_name in camera_names:
-            status = camera_status.get(camera_name, False)
-            status_text = "🟢 Online" if status else "🔴 Offline"
-            status_class = "camera-status-online" if status else "camera-status-offline"
-            st.markdown(f'<div class="{status_class}">{camera_name}: {status_text}</div>', unsafe_allow_html=True)
+        status_container = st.container()
         
         st.markdown("---")
         
-        # Auto-refresh toggle
-        auto_refresh = st.checkbox("Auto Refresh (5s)", value=True)
+        # Live updates toggle (pushed from the backend, no page reruns)
+        live_updates = st.checkbox("Live Updates", value=True)
+        
+        with status_container:
+            if live_updates:
+                render_live_panel('status', camera_names, camera_status, height=30 * len(camera_names) + 10)
+            else:
+                for camera_name in camera_names:
+                    status = camera_status.get(camera_name, False)
+                    status_text = "🟢 Online" if status else "🔴 Offline"
+                    status_class = "camera-status-online" if status else "camera-status-offline"
+                    st.markdown(f'<div class="{status_class}">{camera_name}: {status_text}</div>', unsafe_allow_html=True)
         
         # Manual refresh button
         if st.button("🔄 Refresh Now", use_container_width=True):
@@ -167,12 +363,14 @@ def main():
         st.markdown(f"### 🎥 Live Feed - {selected_camera}")
         
         # Video stream
-        video_url = f"http://{Config.FLASK_HOST}:{Config.FLASK_PORT}/video_feed/{selected_camera}"
+        video_url = f"{API_URL}/video_feed/{selected_camera}"
         st.image(video_url, use_column_width=True)
         
         # Camera info
         status = camera_status.get(selected_camera, False)
-        if status:
+        if live_updates:
+            render_live_panel('banner', camera_names, camera_status, camera=selected_camera, height=60)
+        elif status:
             st.success(f"✅ {selected_camera} is online and streaming")
         else:
             st.error(f"❌ {selected_camera} is offline")
@@ -183,7 +381,10 @@ def main():
         # Get recent detections for selected camera
         detections = get_detection_history(selected_camera)
         
-        if detections:
+        if live_updates:
+            render_live_panel('detections', camera_names, camera_status,
+                              camera=selected_camera, detections=detections, height=260)
+        elif detections:
             # Show latest detections
             for detection in detections[:5]:
                 timestamp = detection[4]
@@ -200,32 +401,18 @@ def main():
         
         # Detection statistics
         st.markdown("### 📈 Detection Statistics")
+        st.caption("Snapshot at page load. Press 🔄 Refresh Now to update.")
         
         all_detections = get_detection_history()
-        if all_detections:
-            # Create DataFrame
-            df_data = []
-            for detection in all_detections:
-                objects = json.loads(detection[2])
-                timestamp = detection[4]
-                camera = detection[1]
-                
-                for obj in objects:
-                    df_data.append({
-                        'Object': obj,
-                        'Camera': camera,
-                        'Timestamp': timestamp
-                    })
-            
-            if df_data:
-                df = pd.DataFrame(df_data)
-                
-                # Object count chart
-                obj_counts = df['Object'].value_counts()
-                fig = px.bar(x=obj_counts.index, y=obj_counts.values, 
-                           title="Object Detection Count")
-                fig.update_layout(height=300)
-                st.plotly_chart(fig, use_container_width=True)
+        objects_df, counts_df = build_detection_frames(
+            tuple(row[0] for row in all_detections), all_detections)
+        if not objects_df.empty:
+            # Object count chart
+            obj_counts = objects_df['Object'].value_counts()
+            fig = px.bar(x=obj_counts.index, y=obj_counts.values, 
+                       title="Object Detection Count")
+            fig.update_layout(height=300)
+            st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No detection data available")
 
@@ -243,36 +430,21 @@ def main():
     
     with tab1:
         st.markdown("### 📊 Analytics Dashboard")
+        st.caption("Snapshot at page load. Press 🔄 Refresh Now to update.")
         
         # Time-based detection analysis
-        if all_detections:
-            df_data = []
-            for detection in all_detections:
-                objects = json.loads(detection[2])
-                timestamp = datetime.strptime(detection[4], '%Y-%m-%d %H:%M:%S')
-                camera = detection[1]
-                
-                df_data.append({
-                    'Count': len(objects),
-                    'Timestamp': timestamp,
-                    'Camera': camera,
-                    'Hour': timestamp.hour
-                })
+        if not counts_df.empty:
+            # Hourly detection pattern
+            hourly_data = counts_df.groupby('Hour')['Count'].sum().reset_index()
+            fig = px.line(hourly_data, x='Hour', y='Count', 
+                        title="Detection Pattern by Hour")
+            st.plotly_chart(fig, use_container_width=True)
             
-            if df_data:
-                df = pd.DataFrame(df_data)
-                
-                # Hourly detection pattern
-                hourly_data = df.groupby('Hour')['Count'].sum().reset_index()
-                fig = px.line(hourly_data, x='Hour', y='Count', 
-                            title="Detection Pattern by Hour")
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Camera-wise detection comparison
-                camera_data = df.groupby('Camera')['Count'].sum().reset_index()
-                fig = px.pie(camera_data, values='Count', names='Camera', 
-                           title="Detection Distribution by Camera")
-                st.plotly_chart(fig, use_container_width=True)
+            # Camera-wise detection comparison
+            camera_data = counts_df.groupby('Camera')['Count'].sum().reset_index()
+            fig = px.pie(camera_data, values='Count', names='Camera', 
+                       title="Detection Distribution by Camera")
+            st.plotly_chart(fig, use_container_width=True)
     
     with tab2:
         st.markdown("### ⚠️ Alert System")
@@ -289,7 +461,10 @@ def main():
         
         # Recent alerts
         st.subheader("Recent Alerts")
-        if all_detections:
+        if live_updates:
+            render_live_panel('alerts', camera_names, camera_status, detections=all_detections, limit=10,
+                              height=300, alert_objects=alert_objects, alert_threshold=alert_threshold)
+        elif all_detections:
             alert_count = 0
             for detection in all_detections[:10]:
                 objects = json.loads(detection[2])
@@ -358,6 +533,8 @@ def main():
                 status = camera_status.get(camera_name, False)
                 status_emoji = "🟢" if status else "🔴"
                 
+                # Cached still instead of a live stream per tile
+                st.image(f"{API_URL}/thumbnail/{camera_name}", use_column_width=True)
                 if st.button(f"{status_emoji} {camera_name}", use_container_width=True):
                     st.session_state.selected_mobile_camera = camera_name
         
@@ -365,13 +542,8 @@ def main():
         if hasattr(st.session_state, 'selected_mobile_camera'):
             selected_mobile = st.session_state.selected_mobile_camera
             st.markdown(f"### 📱 {selected_mobile}")
-            mobile_video_url = f"http://{Config.FLASK_HOST}:{Config.FLASK_PORT}/video_feed/{selected_mobile}"
+            mobile_video_url = f"{API_URL}/video_feed/{selected_mobile}"
             st.image(mobile_video_url, use_column_width=True)
 
-    # Auto-refresh
-    if auto_refresh:
-        time.sleep(5)
-        st.rerun()
-
 if __name__ == "__main__":
     main()
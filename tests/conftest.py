@@ -0,0 +1,14 @@
+import json
+import os
+import sys
+import tempfile
+
+# Config reads the environment at import time, so point it at throwaway
+# storage and a camera that never connects before any app module is imported
+_workdir = tempfile.mkdtemp(prefix='webcam_tests_')
+os.environ['DATABASE_PATH'] = os.path.join(_workdir, 'test.db')
+os.environ['ARCHIVE_PATH'] = os.path.join(_workdir, 'archive')
+os.environ['CAMERA_URLS'] = json.dumps({'Test Camera': os.path.join(_workdir, 'missing.avi')})
+os.environ.pop('COORDINATOR_URL', None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
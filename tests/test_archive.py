@@ -0,0 +1,71 @@
+import pyarrow.dataset as ds
+
+from archive import DetectionArchive
+
+
+def rows(ids, camera='Camera 1', day='2024-01-01'):
+    return [(i, camera, '["person"]', '[0.9]', f"{day} 10:00:{i % 60:02d}") for i in ids]
+
+
+def test_query_newest_first(tmp_path):
+    archive = DetectionArchive(str(tmp_path))
+    archive.write(rows(range(1, 4), day='2024-01-01'))
+    archive.write(rows(range(4, 6), camera='Camera 2', day='2024-01-02'))
+
+    assert [r[0] for r in archive.query(limit=10)] == [5, 4, 3, 2, 1]
+    assert [r[0] for r in archive.query('Camera 1', limit=2)] == [3, 2]
+    assert archive.query('Camera 2', limit=10)[0][1] == 'Camera 2'
+
+
+def test_cursor_query_skips_archive(tmp_path, monkeypatch):
+    archive = DetectionArchive(str(tmp_path))
+    archive.write(rows(range(1, 11)))
+    assert archive.max_id() == 10
+
+    def fail(*args, **kwargs):
+        raise AssertionError('archive partitions should not be opened')
+    monkeypatch.setattr(ds, 'dataset', fail)
+    assert archive.query(limit=10, since_id=10) == []
+    assert archive.query('Camera 2', limit=10, since_id=3) == []
+
+
+def test_cursor_query_prunes_days(tmp_path, monkeypatch):
+    archive = DetectionArchive(str(tmp_path))
+    archive.write(rows(range(1, 4), day='2024-01-02'))
+    # Re-analysed footage: an old day holding newer ids
+    archive.write(rows(range(4, 7), day='2024-01-01'))
+
+    opened = []
+    dataset = ds.dataset
+    monkeypatch.setattr(ds, 'dataset', lambda path, **kwargs: opened.append(path) or dataset(path, **kwargs))
+    assert [r[0] for r in archive.query(limit=10, since_id=4)] == [6, 5]
+    assert len(opened) == 1
+
+
+def test_max_id_without_marker(tmp_path):
+    archive = DetectionArchive(str(tmp_path))
+    archive.write(rows([7, 9]))
+    (tmp_path / '_max_id').unlink()
+    assert archive.max_id() == 9
+
+
+def test_write_leaves_no_temp_files(tmp_path):
+    archive = DetectionArchive(str(tmp_path))
+    archive.write(rows(range(1, 4)))
+    archive.write(rows(range(1, 4)))  # re-archived after a crash
+    names = [p.name for p in tmp_path.rglob('*') if p.is_file()]
+    assert sorted(names) == ['_max_id', 'part-1-3.parquet']
+    assert len(archive.query(limit=10)) == 3
+
+
+def test_history_survives_unreadable_archive(tmp_path):
+    from database import DatabaseManager
+
+    db_manager = DatabaseManager(str(tmp_path / 'test.db'), archive_path=str(tmp_path / 'archive'))
+    db_manager.log_detection('Camera 1', ['person'], [0.9])
+    db_manager.archive.write(rows([100]))
+    # A corrupt part file must not hide the hot rows
+    (tmp_path / 'archive' / 'date=2024-01-01' / 'camera=Camera%201' / 'part-100-100.parquet').write_bytes(b'junk')
+
+    history = db_manager.get_detection_history(limit=10)
+    assert [r[1] for r in history] == ['Camera 1']
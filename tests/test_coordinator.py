@@ -0,0 +1,97 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import coordinator
+from coordinator import HashRing, merge_history
+
+CAMERAS = [f'Camera {i}' for i in range(200)]
+
+
+def test_hash_ring_empty():
+    assert HashRing().get_node('Camera 1') is None
+
+
+def test_hash_ring_only_moves_cameras_to_new_node():
+    ring = HashRing()
+    ring.add_node('worker-1')
+    ring.add_node('worker-2')
+    before = {camera: ring.get_node(camera) for camera in CAMERAS}
+    assert set(before.values()) == {'worker-1', 'worker-2'}
+
+    ring.add_node('worker-3')
+    after = {camera: ring.get_node(camera) for camera in CAMERAS}
+    moved = [camera for camera in CAMERAS if before[camera] != after[camera]]
+    assert moved
+    assert all(after[camera] == 'worker-3' for camera in moved)
+
+    ring.remove_node('worker-3')
+    assert {camera: ring.get_node(camera) for camera in CAMERAS} == before
+
+
+def row(row_id, camera, timestamp):
+    return [row_id, camera, '["person"]', '[0.9]', timestamp]
+
+
+def test_merge_history_dedupes_shared_database_rows():
+    shard_rows = [row(3, 'A', '2024-01-01 10:00:02'), row(2, 'B', '2024-01-01 10:00:01'),
+                  row(1, 'A', '2024-01-01 10:00:00')]
+    merged = merge_history([shard_rows, list(shard_rows), list(shard_rows)], 2)
+    assert [r[0] for r in merged] == [3, 2]
+
+
+def test_merge_history_orders_by_time_or_id():
+    responses = [[row(5, 'A', '2024-01-01 09:00:00')], [row(4, 'B', '2024-01-01 10:00:00')]]
+    assert [r[0] for r in merge_history(responses, 10)] == [4, 5]
+    assert [r[0] for r in merge_history(responses, 10, by_id=True)] == [5, 4]
+
+
+MJPEG_BODY = b''.join(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + payload + b'\r\n'
+                      for payload in (b'\xff\xd8one\xff\xd9', b'\xff\xd8two\xff\xd9'))
+
+
+class FakeWorker(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/video_feed/Test%20Camera':
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+        self.end_headers()
+        self.wfile.write(MJPEG_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def worker():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeWorker)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Registered directly rather than by heartbeat to skip the event relay
+    with coordinator.coordinator.lock:
+        coordinator.coordinator.ring.add_node('test-worker')
+        coordinator.coordinator.workers['test-worker'] = {
+            'url': f"http://127.0.0.1:{server.server_port}", 'last_seen': time.time()}
+    yield
+    with coordinator.coordinator.lock:
+        coordinator.coordinator.ring.remove_node('test-worker')
+        coordinator.coordinator.workers.pop('test-worker', None)
+    server.shutdown()
+
+
+def test_video_feed_proxies_owner_stream(worker):
+    response = coordinator.app.test_client().get('/video_feed/Test Camera')
+    assert response.status_code == 200
+    assert response.content_type == 'multipart/x-mixed-replace; boundary=frame'
+    assert response.data == MJPEG_BODY
+
+
+def test_video_feed_unknown_camera():
+    assert coordinator.app.test_client().get('/video_feed/Nope').status_code == 404
+
+
+def test_video_feed_without_workers():
+    assert coordinator.app.test_client().get('/video_feed/Test Camera').status_code == 503
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import flask_backend
+from database import DatabaseManager
+
+
+def stamp(hours_ago):
+    return (datetime.utcnow() - timedelta(hours=hours_ago)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def seed(db_manager, camera='Camera 1'):
+    """Three live rows, then a back-dated backfill and one more live row"""
+    db_manager.log_detections_bulk([(camera, ['person'], [0.9], stamp(0)) for _ in range(3)])
+    cursor = max(row[0] for row in db_manager.get_detection_history(camera, limit=100))
+    db_manager.log_detections_bulk([(camera, ['car'], [0.8], stamp(48)), (camera, ['car'], [0.8], stamp(47))])
+    db_manager.log_detections_bulk([(camera, ['dog'], [0.7], stamp(0))])
+    return cursor
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    return DatabaseManager(str(tmp_path / 'test.db'))
+
+
+def test_cursor_returns_exactly_newer_rows(db_manager):
+    cursor = seed(db_manager)
+    newer = db_manager.get_detection_history(limit=100, since_id=cursor)
+    assert [row[0] for row in newer] == [cursor + 3, cursor + 2, cursor + 1]
+    assert db_manager.get_detection_history(limit=100, since_id=cursor + 3) == []
+
+
+def test_cursor_window_takes_highest_ids(db_manager):
+    cursor = seed(db_manager)
+    # Back-dated rows must not push newer ids out of a limited cursor read
+    assert [row[0] for row in db_manager.get_detection_history(limit=2, since_id=cursor)] == [cursor + 3, cursor + 2]
+
+
+def test_full_read_is_newest_first_by_time(db_manager):
+    seed(db_manager)
+    history = db_manager.get_detection_history(limit=100)
+    assert [row[4] for row in history] == sorted((row[4] for row in history), reverse=True)
+
+
+def test_since_id_endpoints():
+    cursor = seed(flask_backend.db_manager, camera='Endpoint Camera')
+    client = flask_backend.app.test_client()
+
+    rows = client.get(f'/detection_history/Endpoint Camera?since_id={cursor}').get_json()
+    assert [row[0] for row in rows] == [cursor + 3, cursor + 2, cursor + 1]
+    rows = client.get(f'/all_detection_history?since_id={cursor + 1}').get_json()
+    assert [row[0] for row in rows] == [cursor + 3, cursor + 2]
@@ -0,0 +1,32 @@
+import json
+
+from event_bus import EventBus
+
+
+def parse(chunk):
+    event_line, data_line = chunk.strip().split('\n')
+    return event_line[len('event: '):], json.loads(data_line[len('data: '):])
+
+
+def test_sse_response_streams_snapshot_then_events():
+    bus = EventBus()
+    response = bus.sse_response(lambda: {'Camera 1': True})
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    stream = response.response
+    assert parse(next(stream)) == ('snapshot', {'status': {'Camera 1': True}})
+    bus.publish('camera_status', {'camera': 'Camera 1', 'online': False})
+    assert parse(next(stream)) == ('camera_status', {'camera': 'Camera 1', 'online': False})
+
+    stream.close()
+    assert not bus.subscribers
+
+
+def test_slow_subscriber_drops_oldest_event():
+    bus = EventBus(max_queue=2)
+    queue = bus.subscribe()
+    for i in range(3):
+        bus.publish('detection', {'n': i})
+    assert [queue.get_nowait()[1]['n'] for _ in range(2)] == [1, 2]
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+import app
+import flask_backend
+
+
+@pytest.fixture
+def model_state(monkeypatch):
+    def set_state(state):
+        monkeypatch.setattr(flask_backend, 'model_state', state)
+    return set_state
+
+
+@pytest.mark.parametrize('state', ['loading', 'warming_up', 'failed'])
+def test_ready_is_503_until_model_ready(model_state, state):
+    model_state(state)
+    response = flask_backend.app.test_client().get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['components']['model'] == state
+
+
+def test_ready_is_200_once_model_ready(model_state):
+    model_state('ready')
+    response = flask_backend.app.test_client().get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['ready'] is True
+
+
+class ClientResponse:
+    """requests-style view of a Flask test client response"""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self._json = response.get_json()
+
+    def json(self):
+        return self._json
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Route app.py's readiness polling to flask_backend, one model state per poll"""
+    states = []
+    client = flask_backend.app.test_client()
+
+    def get(url, timeout=None):
+        if len(states) > 1:
+            flask_backend.model_state = states.pop(0)
+        else:
+            flask_backend.model_state = states[0]
+        return ClientResponse(client.get('/ready'))
+
+    monkeypatch.setattr(flask_backend, 'model_state', 'loading')
+    monkeypatch.setattr(app.requests, 'get', get)
+    monkeypatch.setattr(app.time, 'sleep', lambda seconds: None)
+    return states
+
+
+def test_wait_for_backend_ready(backend):
+    backend.extend(['loading', 'warming_up', 'ready'])
+    assert app.wait_for_backend(timeout=5) is True
+
+
+def test_wait_for_backend_stops_on_failed_model(backend):
+    backend.extend(['loading', 'failed'])
+    started = time.time()
+    assert app.wait_for_backend(timeout=30) is False
+    assert time.time() - started < 5
+    assert app.get_model_state() == 'failed'
+
+
+class ExitedProcess:
+    returncode = 1
+
+    def poll(self):
+        return self.returncode
+
+
+def test_wait_for_backend_stops_when_process_exits(backend):
+    backend.append('loading')
+    started = time.time()
+    assert app.wait_for_backend(ExitedProcess(), timeout=30) is False
+    assert time.time() - started < 5
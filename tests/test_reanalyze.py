@@ -0,0 +1,113 @@
+import cv2
+import numpy as np
+import pytest
+
+import reanalyze
+from bench_utils import make_synthetic_video
+from database import DatabaseManager
+from reanalyze import Checkpoint, camera_name_for, seek
+
+
+def test_camera_name_strips_recording_timestamp():
+    assert camera_name_for('/rec/lobby_20240101_080000.mp4') == 'lobby'
+    assert camera_name_for('20240101-080000_cam2.avi') == 'cam2'
+    assert camera_name_for('20240101_080000.mp4') == '20240101_080000'
+    assert camera_name_for('front door.mkv') == 'front door'
+
+
+def test_checkpoint_is_per_stride(tmp_path):
+    video = tmp_path / 'clip.avi'
+    video.write_bytes(b'data')
+    Checkpoint(str(tmp_path), str(video), 'yolov8n.pt', stride=1).save(300)
+
+    assert Checkpoint(str(tmp_path), str(video), 'yolov8n.pt', stride=1).state['next_frame'] == 300
+    assert Checkpoint(str(tmp_path), str(video), 'yolov8n.pt', stride=5).state['next_frame'] == 0
+
+
+def test_seek_lands_on_requested_frame(tmp_path):
+    path = make_synthetic_video(str(tmp_path / 'clip.avi'), 160, 120, seconds=1)
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+
+    cap = seek(cv2.VideoCapture(path), path, 17)
+    ret, frame = cap.read()
+    cap.release()
+    assert ret and np.array_equal(frame, frames[17])
+
+
+class KeyframeSeekCapture:
+    """Capture whose seek lands on an earlier keyframe"""
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        return 0
+
+    def release(self):
+        pass
+
+
+def test_seek_grabs_forward_after_inexact_seek(tmp_path):
+    path = make_synthetic_video(str(tmp_path / 'clip.avi'), 160, 120, seconds=1)
+    expected = seek(cv2.VideoCapture(path), path, 17).read()[1]
+
+    cap = seek(KeyframeSeekCapture(), path, 17)
+    ret, frame = cap.read()
+    cap.release()
+    assert ret and np.array_equal(frame, expected)
+
+
+class FailingDetector:
+    def detect_objects_batch(self, frames, draw=True, raise_errors=False):
+        assert raise_errors
+        raise RuntimeError('CUDA out of memory')
+
+
+def test_inference_error_fails_file_without_checkpoint(tmp_path, monkeypatch):
+    path = make_synthetic_video(str(tmp_path / 'clip.avi'), 160, 120, seconds=1)
+    monkeypatch.setattr(reanalyze, 'detector', FailingDetector())
+    monkeypatch.setattr(reanalyze, 'db_manager', DatabaseManager(str(tmp_path / 'test.db')))
+
+    with pytest.raises(RuntimeError):
+        reanalyze.analyse_file(path, 'clip', 'yolov8n.pt', 1, 8, 3000, str(tmp_path))
+    assert Checkpoint(str(tmp_path), path, 'yolov8n.pt', 1).state['done'] is False
+
+
+class StubDetector:
+    def detect_objects_batch(self, frames, draw=True, raise_errors=False):
+        return [(frame, ['person'], [0.9]) for frame in frames]
+
+
+def test_new_model_pass_replaces_earlier_detections(tmp_path, monkeypatch):
+    path = make_synthetic_video(str(tmp_path / 'lobby_20240101_080000.avi'), 160, 120, seconds=1)
+    db_manager = DatabaseManager(str(tmp_path / 'test.db'), archive_path=str(tmp_path / 'archive'))
+    monkeypatch.setattr(reanalyze, 'detector', StubDetector())
+    monkeypatch.setattr(reanalyze, 'db_manager', db_manager)
+
+    start = reanalyze.recording_start(path, 30, 30).strftime('%Y-%m-%d %H:%M:%S')
+    db_manager.log_detections_bulk([('lobby', ['car'], [0.8], start),  # live row in the span
+                                    ('lobby', ['car'], [0.8], '2023-12-31 00:00:00'),  # outside it
+                                    ('hall', ['car'], [0.8], start)])  # another camera
+    db_manager.compact_detections(hot_hours=0)  # the live rows now sit in the archive
+
+    (tmp_path / 'checkpoints').mkdir()
+
+    def run(model):
+        return reanalyze.analyse_file(path, 'lobby', model, 5, 4, 3000, str(tmp_path / 'checkpoints'))
+
+    assert run('yolov8n.pt')['replaced'] == 1
+    assert run('yolov8n.pt')['skipped']
+    second = run('yolov8s.pt')
+    assert second['replaced'] == second['detections'] == 6
+
+    lobby = db_manager.get_detection_history('lobby', limit=100)
+    assert len(lobby) == 7
+    assert sum(row[2] == '["person"]' for row in lobby) == 6
+    assert len(db_manager.get_detection_history('hall', limit=100)) == 1
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import flask_backend
+
+CAMERA = 'Test Camera'
+
+
+@pytest.fixture
+def client():
+    # Pretend the camera thread has delivered a frame
+    frame = np.full((120, 160, 3), 128, dtype=np.uint8)
+    flask_backend.camera_manager.latest_frames[CAMERA] = (1, frame)
+    flask_backend.camera_manager.camera_online[CAMERA] = True
+    yield flask_backend.app.test_client()
+    flask_backend.camera_manager.latest_frames.pop(CAMERA, None)
+    flask_backend.camera_manager.camera_online[CAMERA] = False
+
+
+def test_snapshot_returns_jpeg_with_etag(client):
+    response = client.get(f'/snapshot/{CAMERA}')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert response.data.startswith(b'\xff\xd8')
+    assert response.headers['ETag'].startswith('"')
+
+
+def test_snapshot_not_modified(client):
+    etag = client.get(f'/snapshot/{CAMERA}').headers['ETag']
+    response = client.get(f'/snapshot/{CAMERA}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_thumbnail_etag_changes_with_frame(client):
+    etag = client.get(f'/thumbnail/{CAMERA}').headers['ETag']
+    flask_backend.camera_manager.latest_frames[CAMERA] = (2, np.zeros((120, 160, 3), dtype=np.uint8))
+    response = client.get(f'/thumbnail/{CAMERA}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_snapshot_rejects_unknown_width(client):
+    assert client.get(f'/snapshot/{CAMERA}?width=123').status_code == 400
+
+
+def test_snapshot_unknown_camera(client):
+    assert client.get('/snapshot/Nope').status_code == 404
@@ -4,52 +4,89 @@ import numpy as np
 from config import Config
 
 class YOLODetector:
-    def __init__(self):
-        self.model = YOLO(Config.YOLO_MODEL_PATH)
-        self.confidence_threshold = Config.CONFIDENCE_THRESHOLD
+    def __init__(self, model_path=None, confidence_threshold=None, device=None):
+        self.model = YOLO(model_path or Config.YOLO_MODEL_PATH)
+        self.confidence_threshold = (Config.CONFIDENCE_THRESHOLD
+                                     if confidence_threshold is None else confidence_threshold)
+        self.device = device
         
-    def detect_objects(self, frame):
+    def warm_up(self, frame_size=(640, 480), batch_size=1):
+        """Run a throwaway inference so the first real frame doesn't pay for lazy initialisation"""
+        blank = np.zeros((frame_size[1], frame_size[0], 3), dtype=np.uint8)
+        # Calls the model directly so a broken model raises instead of being swallowed
+        self.model([blank] * batch_size if batch_size > 1 else blank,
+                   conf=self.confidence_threshold, device=self.device, verbose=False)
+    
+    def detect_objects(self, frame, raise_errors=False):
         """Detect objects in frame and return annotated frame with detection info"""
         try:
             # Run YOLO detection
-            results = self.model(frame, conf=self.confidence_threshold)
-            
-            # Extract detection information
-            detections = []
-            confidences = []
-            
-            # Annotate frame
-            annotated_frame = frame.copy()
-            
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        # Get box coordinates
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-                        confidence = box.conf[0].cpu().numpy()
-                        class_id = int(box.cls[0].cpu().numpy())
-                        
-                        # Get class name
-                        class_name = self.model.names[class_id]
-                        
-                        # Store detection info
-                        detections.append(class_name)
-                        confidences.append(float(confidence))
-                        
-                        # Draw bounding box
-                        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                        
-                        # Draw label
-                        label = f"{class_name}: {confidence:.2f}"
-                        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
-                        cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), 
-                                    (x1 + label_size[0], y1), (0, 255, 0), -1)
-                        cv2.putText(annotated_frame, label, (x1, y1 - 5), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
-            
-            return annotated_frame, detections, confidences
+            results = self.model(frame, conf=self.confidence_threshold,
+                                 device=self.device, verbose=False)
+            return self._annotate(frame, results)
             
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error in object detection: {e}")
             return frame, [], []
+    
+    def detect_objects_batch(self, frames, draw=True, raise_errors=False):
+        """Detect objects in a list of frames with a single model call.
+
+        Live streaming keeps going on a failed call (no detections); batch jobs
+        pass raise_errors=True so a failure isn't recorded as an empty result.
+        """
+        if not frames:
+            return []
+        try:
+            results = self.model(list(frames), conf=self.confidence_threshold,
+                                 device=self.device, verbose=False)
+            return [self._annotate(frame, [result], draw) for frame, result in zip(frames, results)]
+        
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Error in batch object detection: {e}")
+            return [(frame, [], []) for frame in frames]
+    
+    def _annotate(self, frame, results, draw=True):
+        """Draw YOLO results on a copy of frame (unless draw is False) and collect detection info"""
+        # Extract detection information
+        detections = []
+        confidences = []
+        
+        # Annotate frame
+        annotated_frame = frame.copy() if draw else frame
+        
+        for result in results:
+            boxes = result.boxes
+            if boxes is not None:
+                for box in boxes:
+                    # Get box coordinates
+                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
+                    confidence = box.conf[0].cpu().numpy()
+                    class_id = int(box.cls[0].cpu().numpy())
+                    
+                    # Get class name
+                    class_name = self.model.names[class_id]
+                    
+                    # Store detection info
+                    detections.append(class_name)
+                    confidences.append(float(confidence))
+                    
+                    if not draw:
+                        continue
+                    
+                    # Draw bounding box
+                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                    
+                    # Draw label
+                    label = f"{class_name}: {confidence:.2f}"
+                    label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
+                    cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), 
+                                (x1 + label_size[0], y1), (0, 255, 0), -1)
+                    cv2.putText(annotated_frame, label, (x1, y1 - 5), 
+                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
+        
+        return annotated_frame, detections, confidences